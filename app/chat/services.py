@@ -2,15 +2,104 @@
 Chat Services for Message Persistence and Greeting Generation
 """
 
+import asyncio
+import base64
+import threading
+import traceback
 from datetime import datetime, date
 from typing import Optional, List, Dict, Any
-from db.pg_database import execute_query
+from cachetools import TTLCache, cached
+from db.pg_database import execute_prepared, execute_values_query, advisory_lock
+from midwaife.runner import (
+    APP_NAME,
+    session_service,
+    ensure_session_initialized,
+    call_agent_async
+)
+from midwaife.tools.user_data_tools import get_user_context_bundle, set_current_user_id
 
+# Short-lived caches for the chat entry path, keyed by (user_id, today).
+# Both values change at most a few times a day and are invalidated on write.
+_CACHE_TTL_SECONDS = 60
+_today_meals_cache = TTLCache(maxsize=10_000, ttl=_CACHE_TTL_SECONDS)
+_today_greeting_cache = TTLCache(maxsize=10_000, ttl=_CACHE_TTL_SECONDS)
+_cache_lock = threading.Lock()
 
+# Users whose greeting generation failed today. Requests in the cooldown
+# get FALLBACK_GREETING (unsaved) instead of starting another LLM call.
+_GREETING_RETRY_SECONDS = 300
+_greeting_failures = TTLCache(maxsize=10_000, ttl=_GREETING_RETRY_SECONDS)
+
+FALLBACK_GREETING = "Hello! How can I help you with your pregnancy nutrition today?"
+
+# Background event loop for generate_daily_greeting, started lazily
+_greeting_loop: Optional[asyncio.AbstractEventLoop] = None
+_greeting_loop_lock = threading.Lock()
+
+
+def _today_key(user_id: str):
+    return (user_id, date.today())
+
+
+def invalidate_today_meals(user_id: str, log_date: Optional[date] = None) -> None:
+    """
+    Drop the cached meal summary for a user after their meals change.
+
+    Args:
+        user_id: User ID
+        log_date: Date whose meals changed (defaults to today)
+    """
+    log_date = log_date or date.today()
+    if isinstance(log_date, str):
+        log_date = date.fromisoformat(log_date)
+    with _cache_lock:
+        _today_meals_cache.pop((user_id, log_date), None)
+
+
+def greeting_recently_failed(user_id: str) -> bool:
+    """Whether generating today's greeting for a user failed within the cooldown."""
+    with _cache_lock:
+        return _today_key(user_id) in _greeting_failures
+
+
+def invalidate_today_greeting(user_id: str) -> None:
+    """Drop the cached greeting lookup for a user."""
+    with _cache_lock:
+        _today_greeting_cache.pop(_today_key(user_id), None)
+
+
+# (time_of_day, context) for each hour of the day. Users are planning their
+# meals from midnight to 6 AM and tracking what they've eaten afterwards.
+_HOUR_CONTEXT = tuple(
+    (
+        "morning" if hour < 12 else "afternoon" if hour < 18 else "evening",
+        "planning their meals for the day ahead" if hour < 6 else "tracking meals they've eaten"
+    )
+    for hour in range(24)
+)
+
+
+def _row_to_message(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a chat_messages row to the message dict returned by the API."""
+    return {
+        "id": str(row['id']),
+        "user_id": str(row['user_id']),
+        "session_id": row['session_id'],
+        "role": row['role'],
+        "content": row['content'],
+        "message_date": str(row['message_date']),
+        "created_at": str(row['created_at']),
+        "metadata": row['metadata'] or {}
+    }
+
+
+@cached(cache=_today_meals_cache, key=_today_key, lock=_cache_lock)
 def get_today_meals(user_id: str) -> Dict[str, Any]:
     """
     Get meals logged today for the user.
 
+    Results are cached briefly per (user_id, today); see invalidate_today_meals.
+
     Args:
         user_id: User ID
 
@@ -19,29 +108,43 @@ def get_today_meals(user_id: str) -> Dict[str, Any]:
     """
     today = date.today().strftime('%Y-%m-%d')
 
+    # Aggregate server-side so a single summary row comes back instead of
+    # one row per logged food
     query = """
+        WITH items AS (
+            SELECT
+                m.meal_type,
+                m.meal_type_order AS meal_order,
+                f.name AS food_name,
+                f.rainbow_color
+            FROM meals m
+            JOIN meal_items mi ON m.id = mi.meal_id
+            JOIN foods f ON mi.food_id = f.id
+            WHERE m.user_id = %s
+                AND m.log_date = %s
+        ),
+        by_meal AS (
+            SELECT
+                meal_type,
+                meal_order,
+                array_agg(food_name ORDER BY food_name) AS foods
+            FROM items
+            GROUP BY meal_type, meal_order
+        )
         SELECT
-            m.meal_type,
-            f.name as food_name,
-            f.rainbow_color
-        FROM meals m
-        JOIN meal_items mi ON m.id = mi.meal_id
-        JOIN foods f ON mi.food_id = f.id
-        WHERE m.user_id = %s
-            AND m.log_date = %s
-        ORDER BY
-            CASE m.meal_type
-                WHEN 'breakfast' THEN 1
-                WHEN 'lunch' THEN 2
-                WHEN 'dinner' THEN 3
-                WHEN 'snacks' THEN 4
-            END,
-            f.name
-    """
-
-    results = execute_query(query, (user_id, today), fetch_one=False)
-
-    if not results:
+            (SELECT COUNT(*) FROM by_meal) AS meal_count,
+            (SELECT COUNT(*) FROM items) AS food_count,
+            (SELECT json_object_agg(meal_type, foods ORDER BY meal_order, meal_type)
+             FROM by_meal) AS foods_by_meal,
+            (SELECT array_agg(DISTINCT rainbow_color ORDER BY rainbow_color) FILTER (WHERE rainbow_color IS NOT NULL)
+             FROM items) AS unique_colors,
+            (SELECT (array_agg(food_name ORDER BY meal_order, food_name))[1:3]
+             FROM items) AS sample_foods
+    """
+
+    result = execute_prepared('chat_today_meals', query, (user_id, today), fetch_one=True)
+
+    if not result or not result['food_count']:
         return {
             "has_meals": False,
             "meal_count": 0,
@@ -50,32 +153,13 @@ def get_today_meals(user_id: str) -> Dict[str, Any]:
             "unique_colors": []
         }
 
-    # Organize by meal type
-    foods_by_meal = {}
-    all_foods = []
-    colors = set()
-
-    for row in results:
-        meal_type = row['meal_type']
-        food_name = row['food_name']
-        rainbow_color = row['rainbow_color']
-
-        if meal_type not in foods_by_meal:
-            foods_by_meal[meal_type] = []
-
-        foods_by_meal[meal_type].append(food_name)
-        all_foods.append(food_name)
-
-        if rainbow_color:
-            colors.add(rainbow_color)
-
     return {
         "has_meals": True,
-        "meal_count": len(foods_by_meal),
-        "food_count": len(all_foods),
-        "foods_by_meal": foods_by_meal,
-        "unique_colors": sorted(list(colors)),
-        "sample_foods": all_foods[:3]  # First 3 foods for mention
+        "meal_count": result['meal_count'],
+        "food_count": result['food_count'],
+        "foods_by_meal": result['foods_by_meal'],
+        "unique_colors": result['unique_colors'] or [],
+        "sample_foods": result['sample_foods'] or []  # First 3 foods for mention
     }
 
 
@@ -99,38 +183,59 @@ def save_message(
     Returns:
         Saved message dict with id and created_at
     """
-    import json
-
     query = """
         INSERT INTO chat_messages (user_id, session_id, role, content, metadata)
         VALUES (%s, %s, %s, %s, %s)
         RETURNING id, user_id, session_id, role, content, message_date, created_at, metadata
     """
 
-    metadata_json = json.dumps(metadata or {})
-
-    result = execute_query(
+    result = execute_prepared(
+        'chat_save_message',
         query,
-        (user_id, session_id, role, content, metadata_json),
+        (user_id, session_id, role, content, metadata or {}),
         fetch_one=True
     )
 
-    return {
-        "id": str(result['id']),
-        "user_id": str(result['user_id']),
-        "session_id": result['session_id'],
-        "role": result['role'],
-        "content": result['content'],
-        "message_date": str(result['message_date']),
-        "created_at": str(result['created_at']),
-        "metadata": result.get('metadata', {})
-    }
+    return _row_to_message(result)
+
+
+def save_messages(
+    messages: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Save many chat messages in one round-trip (history imports, replays).
+
+    Args:
+        messages: Dicts with user_id, session_id, role, content and
+            optional metadata
+
+    Returns:
+        Saved message dicts, in insertion order
+    """
+    query = """
+        INSERT INTO chat_messages (user_id, session_id, role, content, metadata)
+        VALUES %s
+        RETURNING id, user_id, session_id, role, content, message_date, created_at, metadata
+    """
+
+    rows = [
+        (m['user_id'], m['session_id'], m['role'], m['content'], m.get('metadata') or {})
+        for m in messages
+    ]
+
+    results = execute_values_query(query, rows, template="(%s, %s, %s, %s, %s)")
 
+    return [_row_to_message(row) for row in results]
 
+
+@cached(cache=_today_greeting_cache, key=_today_key, lock=_cache_lock)
 def get_today_greeting(user_id: str) -> Optional[Dict[str, Any]]:
     """
     Check if a greeting has already been sent today.
 
+    Results are cached briefly per (user_id, today); saving a greeting
+    invalidates the entry.
+
     Args:
         user_id: User ID
 
@@ -148,35 +253,127 @@ def get_today_greeting(user_id: str) -> Optional[Dict[str, Any]]:
         LIMIT 1
     """
 
-    result = execute_query(query, (user_id,), fetch_one=True)
+    result = execute_prepared('chat_today_greeting', query, (user_id,), fetch_one=True)
 
     if not result:
         return None
 
-    return {
-        "id": str(result['id']),
-        "user_id": str(result['user_id']),
-        "session_id": result['session_id'],
-        "role": result['role'],
-        "content": result['content'],
-        "message_date": str(result['message_date']),
-        "created_at": str(result['created_at']),
-        "metadata": result.get('metadata', {})
-    }
+    return _row_to_message(result)
+
+
+def save_daily_greeting(
+    user_id: str,
+    session_id: str,
+    content: str,
+    metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Save today's greeting unless one already exists, in a single round trip.
+
+    If another request stored a greeting while this one was being generated,
+    the existing greeting is returned instead of inserting a duplicate. The
+    partial unique index idx_chat_messages_daily_greeting guarantees this
+    even when both inserts race.
+
+    Args:
+        user_id: User ID
+        session_id: Session ID
+        content: Greeting text
+        metadata: Optional metadata dict (is_greeting is always set)
+
+    Returns:
+        Greeting message dict (either newly saved or already existing)
+    """
+    query = """
+        WITH existing AS (
+            SELECT id, user_id, session_id, role, content, message_date, created_at, metadata
+            FROM chat_messages
+            WHERE user_id = %s
+              AND message_date = CURRENT_DATE
+              AND role = 'system'
+              AND metadata->>'is_greeting' = 'true'
+            ORDER BY created_at DESC
+            LIMIT 1
+        ),
+        inserted AS (
+            INSERT INTO chat_messages (user_id, session_id, role, content, metadata)
+            SELECT %s::uuid, %s, 'system', %s, %s::jsonb
+            WHERE NOT EXISTS (SELECT 1 FROM existing)
+            ON CONFLICT (user_id, message_date)
+                WHERE role = 'system' AND (metadata->>'is_greeting') = 'true'
+                DO NOTHING
+            RETURNING id, user_id, session_id, role, content, message_date, created_at, metadata
+        )
+        SELECT * FROM existing
+        UNION ALL
+        SELECT * FROM inserted
+    """
+
+    metadata = {**(metadata or {}), 'is_greeting': True}
+
+    result = execute_prepared(
+        'chat_save_daily_greeting',
+        query,
+        (user_id, user_id, session_id, content, metadata),
+        fetch_one=True
+    )
+
+    # A cached "no greeting yet" answer is now stale either way
+    invalidate_today_greeting(user_id)
+
+    if not result:
+        # Lost the insert race to a concurrent request; its row is committed now
+        return get_today_greeting(user_id)
+
+    return _row_to_message(result)
+
+
+def encode_message_cursor(message: Dict[str, Any]) -> str:
+    """
+    Build an opaque pagination cursor pointing at a message.
+
+    Args:
+        message: Message dict as returned by get_recent_messages
+
+    Returns:
+        URL-safe cursor string for the `before` parameter
+    """
+    raw = f"{message['created_at']}|{message['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_message_cursor(cursor: str) -> tuple:
+    """
+    Decode a cursor from encode_message_cursor into (created_at, id).
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        created_at, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    except Exception:
+        raise ValueError(f"Invalid message cursor: {cursor}")
+    return created_at, message_id
 
 
 def get_recent_messages(
     user_id: str,
     limit: int = 50,
-    since_date: Optional[str] = None
+    since_date: Optional[str] = None,
+    before: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """
     Get recent chat messages for a user.
 
+    Without since_date, pages backwards through history using keyset
+    pagination on (created_at, id): pass the cursor of the oldest message
+    already shown as `before` to get the page preceding it.
+
     Args:
         user_id: User ID
         limit: Maximum number of messages to return
         since_date: Optional date to filter messages from (YYYY-MM-DD)
+        before: Optional cursor from encode_message_cursor (ignored with since_date)
 
     Returns:
         List of message dicts ordered by creation time
@@ -191,33 +388,34 @@ def get_recent_messages(
             LIMIT %s
         """
         params = (user_id, since_date, limit)
+        statement = 'chat_recent_messages_since'
     else:
         query = """
             SELECT id, user_id, session_id, role, content, message_date, created_at, metadata
             FROM chat_messages
             WHERE user_id = %s
-            ORDER BY created_at DESC
+            ORDER BY created_at DESC, id DESC
             LIMIT %s
         """
         params = (user_id, limit)
+        statement = 'chat_recent_messages'
 
-    results = execute_query(query, params, fetch_one=False)
+    if before and not since_date:
+        created_at, message_id = decode_message_cursor(before)
+        query = """
+            SELECT id, user_id, session_id, role, content, message_date, created_at, metadata
+            FROM chat_messages
+            WHERE user_id = %s
+              AND (created_at, id) < (%s::timestamptz, %s::uuid)
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s
+        """
+        params = (user_id, created_at, message_id, limit)
+        statement = 'chat_recent_messages_before'
 
-    if not results:
-        return []
+    results = execute_prepared(statement, query, params, fetch_one=False)
 
-    messages = []
-    for row in results:
-        messages.append({
-            "id": str(row['id']),
-            "user_id": str(row['user_id']),
-            "session_id": row['session_id'],
-            "role": row['role'],
-            "content": row['content'],
-            "message_date": str(row['message_date']),
-            "created_at": str(row['created_at']),
-            "metadata": row.get('metadata', {})
-        })
+    messages = [_row_to_message(row) for row in results]
 
     # If we did DESC order, reverse to get chronological
     if not since_date:
@@ -226,39 +424,83 @@ def get_recent_messages(
     return messages
 
 
-async def generate_daily_greeting_async(user_id: str) -> str:
+async def get_today_meals_async(user_id: str) -> Dict[str, Any]:
+    """Async variant of get_today_meals; runs the query in a worker thread."""
+    return await asyncio.to_thread(get_today_meals, user_id)
+
+
+async def get_today_greeting_async(user_id: str) -> Optional[Dict[str, Any]]:
+    """Async variant of get_today_greeting; runs the query in a worker thread."""
+    return await asyncio.to_thread(get_today_greeting, user_id)
+
+
+async def save_message_async(
+    user_id: str,
+    session_id: str,
+    role: str,
+    content: str,
+    metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Async variant of save_message; runs the insert in a worker thread."""
+    return await asyncio.to_thread(save_message, user_id, session_id, role, content, metadata)
+
+
+async def get_recent_messages_async(
+    user_id: str,
+    limit: int = 50,
+    since_date: Optional[str] = None,
+    before: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Async variant of get_recent_messages; runs the query in a worker thread."""
+    return await asyncio.to_thread(get_recent_messages, user_id, limit, since_date, before)
+
+
+async def _given_or_fetched(value: Optional[Dict[str, Any]], fetch, user_id: str) -> Dict[str, Any]:
+    """Return a context dict the caller already has, or load it in a worker thread."""
+    if value is not None:
+        return value
+    return await asyncio.to_thread(fetch, user_id)
+
+
+async def generate_daily_greeting_async(
+    user_id: str,
+    today_meals: Optional[Dict[str, Any]] = None,
+    user_profile: Optional[Dict[str, Any]] = None,
+    fallback: bool = True
+) -> str:
     """
     Generate a personalized daily greeting using the AI agent (async version).
 
-    The agent will use its tools to understand the user's context and
-    generate a natural, personalized greeting.
+    The user's profile, today's meals and weekly rainbow progress are fetched
+    concurrently up front and given to the agent in the prompt, so it can
+    write the greeting without extra tool round trips. Callers that already
+    loaded the meal summary can pass it in to skip that query; a passed
+    profile takes precedence over the bundled one.
 
     Args:
         user_id: User ID
+        today_meals: Precomputed get_today_meals() result
+        user_profile: Precomputed get_user_info_tool() result
+        fallback: Return a generic greeting if generation fails; when
+            False the error is raised instead
 
     Returns:
         Greeting message text
     """
     try:
-        from midwaife.routes import call_agent_async
-
         # Get current hour for context
         hour = datetime.now().hour
-        if hour < 12:
-            time_of_day = "morning"
-        elif hour < 18:
-            time_of_day = "afternoon"
-        else:
-            time_of_day = "evening"
-
-        # Determine if user is planning (midnight to 6 AM) or tracking (after 6 AM)
-        if hour < 6:
-            context = "planning their meals for the day ahead"
-        else:
-            context = "tracking meals they've eaten"
-
-        # Get today's meals to add to prompt context
-        today_meals = get_today_meals(user_id)
+        time_of_day, context = _HOUR_CONTEXT[hour]
+
+        # Fetch the independent prompt inputs concurrently (each on its own
+        # pooled connection) so DB wall time is the slowest lookup, not the
+        # sum. Profile and rainbow progress come from one bundled query.
+        today_meals, bundle = await asyncio.gather(
+            _given_or_fetched(today_meals, get_today_meals, user_id),
+            asyncio.to_thread(get_user_context_bundle, user_id)
+        )
+        user_info = user_profile or bundle['user_info']
+        rainbow = bundle['rainbow_summary']
 
         # Create a detailed prompt for the agent
         if today_meals['has_meals']:
@@ -269,17 +511,27 @@ async def generate_daily_greeting_async(user_id: str) -> str:
         else:
             meal_context = "The user hasn't logged any meals yet today. "
 
+        if user_info.get('first_name'):
+            user_context = f"Name: {user_info['first_name']}, pregnancy week: {user_info['current_week']}"
+        else:
+            user_context = "Unknown - use your tools to look it up"
+
+        consumed = ', '.join(rainbow['consumed_colors']) or 'none yet'
+        missing = ', '.join(rainbow['missing_colors']) or 'none'
+        rainbow_context = f"Colors eaten this week: {consumed}. Still missing: {missing}"
+
         prompt = f"""Generate a warm, personalized {time_of_day} greeting for this user (user_id: {user_id}).
 
 Context:
 - Current time: {time_of_day} ({hour}:00)
 - User is currently {context}
 - {meal_context}
+- User information: {user_context}
+- Rainbow color progress: {rainbow_context}
 
 Instructions:
-1. Use your tools to get the user's information (name, pregnancy week) - pass user_id: {user_id}
-2. Check their rainbow color progress for the week - pass user_id: {user_id}
-3. Create a friendly, encouraging greeting that:
+1. Use the user information and rainbow progress above (only call your tools if something is missing) - user_id: {user_id}
+2. Create a friendly, encouraging greeting that:
    - Uses their first name
    - Mentions their current pregnancy week and trimester
    - {"Acknowledges the meals they've planned/logged today" if today_meals['has_meals'] else "Encourages them to start tracking"}
@@ -291,8 +543,6 @@ Keep it warm, natural, and conversational. Use **bold** for emphasis on key info
 Don't be too long - aim for 3-4 sentences plus the closing question."""
 
         # Ensure session is initialized and set user_id in session state
-        from midwaife.routes import session_service, APP_NAME, ensure_session_initialized
-
         try:
             # Initialize session if not already done
             await ensure_session_initialized()
@@ -309,7 +559,9 @@ Don't be too long - aim for 3-4 sentences plus the closing question."""
         except Exception as e:
             print(f"Warning: Could not set user_id in session state: {e}")
 
-        # Use the existing call_agent_async function with default session
+        # Use the existing call_agent_async function with default session;
+        # tools the agent calls default to this user
+        set_current_user_id(user_id)
         greeting = await call_agent_async(
             query=prompt,
             user_id="default_user",  # Use default ADK session user
@@ -319,51 +571,182 @@ Don't be too long - aim for 3-4 sentences plus the closing question."""
         return greeting.strip()
 
     except Exception as e:
+        if not fallback:
+            raise
         # Fallback greeting if agent fails
         print(f"Error generating AI greeting: {e}")
-        import traceback
         traceback.print_exc()
-        return f"Hello! How can I help you with your pregnancy nutrition today?"
+        return FALLBACK_GREETING
 
 
-def generate_daily_greeting(user_id: str) -> str:
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get the long-lived event loop used by the synchronous greeting wrapper.
+
+    The loop runs forever in a daemon thread and is started on first use,
+    so repeated calls reuse one loop (and any clients bound to it) instead
+    of spinning up a thread and a fresh loop per greeting.
+    """
+    global _greeting_loop
+    with _greeting_loop_lock:
+        if _greeting_loop is None:
+            _greeting_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_greeting_loop.run_forever,
+                name="greeting-loop",
+                daemon=True
+            ).start()
+        return _greeting_loop
+
+
+def generate_daily_greeting(
+    user_id: str,
+    today_meals: Optional[Dict[str, Any]] = None,
+    user_profile: Optional[Dict[str, Any]] = None,
+    fallback: bool = True
+) -> str:
     """
     Synchronous wrapper for generate_daily_greeting_async.
 
+    Safe to call from any thread, including while another event loop is
+    running; the coroutine is submitted to the shared background loop.
+
     Args:
         user_id: User ID
+        today_meals: Precomputed get_today_meals() result
+        user_profile: Precomputed get_user_info_tool() result
+        fallback: Return a generic greeting if generation fails; when
+            False the error is raised instead
 
     Returns:
         Greeting message text
     """
-    import asyncio
     try:
-        # Check if we're already in an async context
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            # We're in an async context, can't use asyncio.run
-            # Create a new event loop in a thread instead
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(asyncio.run, generate_daily_greeting_async(user_id))
-                return future.result()
-        else:
-            # Not in async context, safe to use asyncio.run
-            return asyncio.run(generate_daily_greeting_async(user_id))
+        future = asyncio.run_coroutine_threadsafe(
+            generate_daily_greeting_async(user_id, today_meals, user_profile, fallback),
+            _background_loop()
+        )
+        return future.result()
     except Exception as e:
+        if not fallback:
+            raise
         print(f"Error in synchronous wrapper: {e}")
-        import traceback
         traceback.print_exc()
-        return f"Hello! How can I help you with your pregnancy nutrition today?"
+        return FALLBACK_GREETING
+
+
+def create_daily_greeting(
+    user_id: str,
+    session_id: str,
+    today_meals: Optional[Dict[str, Any]] = None,
+    user_profile: Optional[Dict[str, Any]] = None,
+    wait: bool = True
+) -> Optional[Dict[str, Any]]:
+    """
+    Generate and save today's greeting.
+
+    Generation is serialized per user and day with an advisory lock, and the
+    greeting is re-checked once the lock is held, so concurrent requests (or
+    workers) only pay for one LLM call.
+
+    Args:
+        user_id: User ID
+        session_id: Current session ID
+        today_meals: Precomputed get_today_meals() result
+        user_profile: Precomputed get_user_info_tool() result
+        wait: Wait for a generation already in progress elsewhere; when
+            False, return None straight away instead of holding a lock
+            connection for the length of someone else's LLM call
+
+    Returns:
+        Greeting message dict, or None if wait=False and another request
+        is generating it
+
+    Raises:
+        Exception: If the greeting could not be generated. Nothing is
+            saved then; the failure is remembered for a few minutes (see
+            greeting_recently_failed) so callers can back off instead of
+            showing a generic fallback all day.
+    """
+    with advisory_lock(f"daily_greeting:{user_id}:{date.today()}", wait=wait) as acquired:
+        if not acquired:
+            return None
+
+        # Another request may have generated it while we waited for the lock
+        invalidate_today_greeting(user_id)
+        existing_greeting = get_today_greeting(user_id)
+        if existing_greeting:
+            return existing_greeting
+
+        # Generate new greeting
+        try:
+            greeting_content = generate_daily_greeting(user_id, today_meals, user_profile, fallback=False)
+        except Exception:
+            with _cache_lock:
+                _greeting_failures[_today_key(user_id)] = True
+            raise
+
+        # Save to database (returns the existing greeting if one won the race)
+        return save_daily_greeting(
+            user_id=user_id,
+            session_id=session_id,
+            content=greeting_content,
+            metadata={'is_greeting': True, 'generated_at': str(datetime.now())}
+        )
+
+
+def pregenerate_daily_greetings(active_days: int = 7) -> int:
+    """
+    Generate today's greeting ahead of time for recently active users.
+
+    Meant to run from a scheduled job before users wake up, so their first
+    greeting request of the day is a lookup instead of an LLM call. Users
+    who already have today's greeting, or whose greeting is being generated
+    elsewhere, are skipped. Greetings are generated one at a time to stay
+    within model rate limits.
 
+    Args:
+        active_days: Users with a chat message in this many past days count
+            as active
 
-def get_or_create_daily_greeting(user_id: str, session_id: str) -> Dict[str, Any]:
+    Returns:
+        Number of greetings generated
+    """
+    query = """
+        SELECT DISTINCT user_id
+        FROM chat_messages
+        WHERE message_date >= CURRENT_DATE - %s::int
+    """
+    rows = execute_prepared('chat_active_users', query, (active_days,))
+
+    generated = 0
+    for row in rows:
+        user_id = str(row['user_id'])
+        if get_today_greeting(user_id):
+            continue
+        try:
+            if create_daily_greeting(user_id, "default_session", wait=False):
+                generated += 1
+        except Exception as e:
+            print(f"Error pregenerating daily greeting for {user_id}: {e}")
+
+    return generated
+
+
+def get_or_create_daily_greeting(
+    user_id: str,
+    session_id: str,
+    today_meals: Optional[Dict[str, Any]] = None,
+    user_profile: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
     """
     Get today's greeting if it exists, or generate and save a new one.
 
     Args:
         user_id: User ID
         session_id: Current session ID
+        today_meals: Precomputed get_today_meals() result, if already loaded
+        user_profile: Precomputed get_user_info_tool() result, if already loaded
 
     Returns:
         Greeting message dict
@@ -374,16 +757,4 @@ def get_or_create_daily_greeting(user_id: str, session_id: str) -> Dict[str, Any
     if existing_greeting:
         return existing_greeting
 
-    # Generate new greeting
-    greeting_content = generate_daily_greeting(user_id)
-
-    # Save to database
-    greeting_message = save_message(
-        user_id=user_id,
-        session_id=session_id,
-        role='system',
-        content=greeting_content,
-        metadata={'is_greeting': True, 'generated_at': str(datetime.now())}
-    )
-
-    return greeting_message
+    return create_daily_greeting(user_id, session_id, today_meals, user_profile)
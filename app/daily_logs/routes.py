@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, Query
 from datetime import date
 from typing import List
@@ -10,7 +11,7 @@ router = APIRouter(prefix="/api/daily-logs", tags=["daily-logs"])
 async def get_daily_log(user_id: str, log_date: date):
     """Get daily log for a specific user and date"""
     try:
-        log = daily_log_service.get_daily_log(user_id, log_date)
+        log = await asyncio.to_thread(daily_log_service.get_daily_log, user_id, log_date)
         if not log:
             raise HTTPException(
                 status_code=404,
@@ -30,7 +31,7 @@ async def get_daily_logs_range(
 ):
     """Get daily logs for a user within a date range"""
     try:
-        logs = daily_log_service.get_daily_logs_range(user_id, start_date, end_date)
+        logs = await asyncio.to_thread(daily_log_service.get_daily_logs_range, user_id, start_date, end_date)
         return logs
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching daily logs: {str(e)}")
@@ -39,16 +40,20 @@ async def get_daily_logs_range(
 async def create_daily_log(log_data: DailyLogCreate):
     """Create a new daily log entry"""
     try:
-        log = daily_log_service.create_daily_log(log_data)
+        log = await asyncio.to_thread(daily_log_service.create_daily_log, log_data)
         return log
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating daily log: {str(e)}")
 
 @router.put("/{user_id}/{log_date}", response_model=DailyLog)
 async def update_daily_log(user_id: str, log_date: date, log_data: DailyLogUpdate):
-    """Update an existing daily log entry"""
+    """Update an existing daily log entry
+
+    Single UPDATE ... RETURNING round trip; 404 means no log exists for
+    (user_id, log_date).
+    """
     try:
-        log = daily_log_service.update_daily_log(user_id, log_date, log_data)
+        log = await asyncio.to_thread(daily_log_service.update_daily_log, user_id, log_date, log_data)
         if not log:
             raise HTTPException(
                 status_code=404,
@@ -64,16 +69,20 @@ async def update_daily_log(user_id: str, log_date: date, log_data: DailyLogUpdat
 async def upsert_daily_log(log_data: DailyLogCreate):
     """Create or update a daily log entry (upsert)"""
     try:
-        log = daily_log_service.upsert_daily_log(log_data)
+        log = await asyncio.to_thread(daily_log_service.upsert_daily_log, log_data)
         return log
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error upserting daily log: {str(e)}")
 
 @router.delete("/{user_id}/{log_date}")
 async def delete_daily_log(user_id: str, log_date: date):
-    """Delete a daily log entry"""
+    """Delete a daily log entry
+
+    Single DELETE round trip judged by rowcount; 404 means no log exists for
+    (user_id, log_date).
+    """
     try:
-        deleted = daily_log_service.delete_daily_log(user_id, log_date)
+        deleted = await asyncio.to_thread(daily_log_service.delete_daily_log, user_id, log_date)
         if not deleted:
             raise HTTPException(
                 status_code=404,
@@ -1,11 +1,57 @@
-from typing import Optional, Dict, List
-from datetime import date
-from db.pg_database import execute_query
+import threading
+from typing import Optional, Dict, List, Union
+from datetime import date, timedelta
+from cachetools import LRUCache
+from db.pg_database import execute_prepared
 from daily_logs.models import DailyLog, DailyLogCreate, DailyLogUpdate
 
+# Read-through cache for past days, keyed by (user_id, log_date). Today's log
+# is still being filled in, so only earlier dates are cached; every write path
+# pops its key. None is cached too, so empty past days don't hit the DB.
+_history_cache = LRUCache(maxsize=50_000)
+_history_lock = threading.Lock()
+_MISSING = object()
+
+# Longest past range served from the per-day cache; longer ranges go to the DB
+_MAX_CACHED_RANGE_DAYS = 366
+
+
+def invalidate_daily_log(user_id: str, log_date: Union[date, str]) -> None:
+    """
+    Drop the cached log for a user and date after it changes.
+
+    Args:
+        user_id: User ID
+        log_date: Date whose log changed (date or YYYY-MM-DD string)
+    """
+    if isinstance(log_date, str):
+        log_date = date.fromisoformat(log_date)
+    with _history_lock:
+        _history_cache.pop((str(user_id), log_date), None)
+
+
 class DailyLogService:
     def get_daily_log(self, user_id: str, log_date: date) -> Optional[DailyLog]:
-        """Get daily log for a specific user and date"""
+        """Get daily log for a specific user and date
+
+        Past dates are served from the history cache after the first read.
+        """
+        if log_date >= date.today():
+            return self._fetch_daily_log(user_id, log_date)
+
+        key = (str(user_id), log_date)
+        with _history_lock:
+            cached = _history_cache.get(key, _MISSING)
+        if cached is not _MISSING:
+            return cached
+
+        log = self._fetch_daily_log(user_id, log_date)
+        with _history_lock:
+            _history_cache[key] = log
+        return log
+
+    def _fetch_daily_log(self, user_id: str, log_date: date) -> Optional[DailyLog]:
+        """Read a single daily log from the database"""
         query = """
             SELECT
                 id,
@@ -23,7 +69,7 @@ class DailyLogService:
             WHERE user_id = %s AND log_date = %s
         """
 
-        result = execute_query(query, (user_id, log_date), fetch_one=True)
+        result = execute_prepared('daily_log_get', query, (user_id, log_date), fetch_one=True)
 
         if not result:
             return None
@@ -31,7 +77,47 @@ class DailyLogService:
         return self._map_daily_log(result)
 
     def get_daily_logs_range(self, user_id: str, start_date: date, end_date: date) -> List[DailyLog]:
-        """Get daily logs for a date range"""
+        """Get daily logs for a date range
+
+        The part of the range before today is assembled from the history
+        cache when every day is cached, otherwise read once and cached per
+        day; today onwards is always read live.
+        """
+        today = date.today()
+        history_end = min(end_date, today - timedelta(days=1))
+        history_days = (history_end - start_date).days + 1
+
+        if history_days <= 0 or history_days > _MAX_CACHED_RANGE_DAYS:
+            return self._fetch_daily_logs_range(user_id, start_date, end_date)
+
+        history = self._get_cached_history(user_id, start_date, history_days)
+
+        live: List[DailyLog] = []
+        if end_date >= today:
+            live = self._fetch_daily_logs_range(user_id, today, end_date)
+
+        return live + history
+
+    def _get_cached_history(self, user_id: str, start_date: date, days: int) -> List[DailyLog]:
+        """Past logs for `days` days from start_date, newest first"""
+        user_key = str(user_id)
+        dates = [start_date + timedelta(days=i) for i in range(days)]
+
+        with _history_lock:
+            cached = [_history_cache.get((user_key, d), _MISSING) for d in dates]
+
+        if _MISSING in cached:
+            fetched = self._fetch_daily_logs_range(user_id, dates[0], dates[-1])
+            by_date = {log.log_date: log for log in fetched}
+            cached = [by_date.get(d) for d in dates]
+            with _history_lock:
+                for d, log in zip(dates, cached):
+                    _history_cache[(user_key, d)] = log
+
+        return [log for log in reversed(cached) if log is not None]
+
+    def _fetch_daily_logs_range(self, user_id: str, start_date: date, end_date: date) -> List[DailyLog]:
+        """Read daily logs for a date range from the database"""
         query = """
             SELECT
                 id,
@@ -50,7 +136,7 @@ class DailyLogService:
             ORDER BY log_date DESC
         """
 
-        results = execute_query(query, (user_id, start_date, end_date), fetch_all=True)
+        results = execute_prepared('daily_log_range', query, (user_id, start_date, end_date), fetch_all=True)
         return [self._map_daily_log(row) for row in results]
 
     def create_daily_log(self, log_data: DailyLogCreate) -> DailyLog:
@@ -81,7 +167,8 @@ class DailyLogService:
                 updated_at
         """
 
-        result = execute_query(
+        result = execute_prepared(
+            'daily_log_create',
             query,
             (
                 log_data.user_id,
@@ -96,50 +183,27 @@ class DailyLogService:
             fetch_one=True,
         )
 
+        invalidate_daily_log(log_data.user_id, log_data.log_date)
         return self._map_daily_log(result)
 
     def update_daily_log(
         self, user_id: str, log_date: date, log_data: DailyLogUpdate
     ) -> Optional[DailyLog]:
-        """Update an existing daily log entry"""
-        # Build dynamic UPDATE query based on provided fields
-        update_fields = []
-        params = []
-
-        if log_data.sleep_hours is not None:
-            update_fields.append("sleep_hours = %s")
-            params.append(log_data.sleep_hours)
-
-        if log_data.sleep_quality is not None:
-            update_fields.append("sleep_quality = %s")
-            params.append(log_data.sleep_quality)
-
-        if log_data.sleep_notes is not None:
-            update_fields.append("sleep_notes = %s")
-            params.append(log_data.sleep_notes)
-
-        if log_data.symptoms is not None:
-            update_fields.append("symptoms = %s")
-            params.append(log_data.symptoms)
+        """Update an existing daily log entry
 
-        if log_data.symptom_severity is not None:
-            update_fields.append("symptom_severity = %s")
-            params.append(log_data.symptom_severity)
-
-        if log_data.symptom_notes is not None:
-            update_fields.append("symptom_notes = %s")
-            params.append(log_data.symptom_notes)
-
-        if not update_fields:
-            # No fields to update
-            return self.get_daily_log(user_id, log_date)
-
-        # Add WHERE clause parameters
-        params.extend([user_id, log_date])
-
-        query = f"""
+        Fields left as None keep their current value. Returns None when no
+        log exists for (user_id, log_date).
+        """
+        query = """
             UPDATE daily_logs
-            SET {', '.join(update_fields)}
+            SET
+                sleep_hours = COALESCE(%s, sleep_hours),
+                sleep_quality = COALESCE(%s, sleep_quality),
+                sleep_notes = COALESCE(%s, sleep_notes),
+                symptoms = COALESCE(%s, symptoms),
+                symptom_severity = COALESCE(%s, symptom_severity),
+                symptom_notes = COALESCE(%s, symptom_notes),
+                updated_at = NOW()
             WHERE user_id = %s AND log_date = %s
             RETURNING
                 id,
@@ -155,7 +219,23 @@ class DailyLogService:
                 updated_at
         """
 
-        result = execute_query(query, tuple(params), fetch_one=True)
+        result = execute_prepared(
+            'daily_log_update',
+            query,
+            (
+                log_data.sleep_hours,
+                log_data.sleep_quality,
+                log_data.sleep_notes,
+                log_data.symptoms,
+                log_data.symptom_severity,
+                log_data.symptom_notes,
+                user_id,
+                log_date,
+            ),
+            fetch_one=True,
+        )
+
+        invalidate_daily_log(user_id, log_date)
 
         if not result:
             return None
@@ -198,7 +278,8 @@ class DailyLogService:
                 updated_at
         """
 
-        result = execute_query(
+        result = execute_prepared(
+            'daily_log_upsert',
             query,
             (
                 log_data.user_id,
@@ -213,33 +294,34 @@ class DailyLogService:
             fetch_one=True,
         )
 
+        invalidate_daily_log(log_data.user_id, log_data.log_date)
         return self._map_daily_log(result)
 
     def delete_daily_log(self, user_id: str, log_date: date) -> bool:
-        """Delete a daily log entry"""
+        """Delete a daily log entry
+
+        Relies on the DELETE rowcount alone (no existence SELECT); returns
+        False when no log exists for (user_id, log_date).
+        """
         query = """
             DELETE FROM daily_logs
             WHERE user_id = %s AND log_date = %s
         """
 
-        rowcount = execute_query(query, (user_id, log_date), fetch_all=False)
+        rowcount = execute_prepared('daily_log_delete', query, (user_id, log_date), fetch_all=False)
+        invalidate_daily_log(user_id, log_date)
         return rowcount > 0
 
     def _map_daily_log(self, row: Dict) -> DailyLog:
-        """Map database row to DailyLog model"""
-        return DailyLog(
-            id=row["id"],
-            user_id=row["user_id"],
-            log_date=row["log_date"],
-            sleep_hours=row.get("sleep_hours"),
-            sleep_quality=row.get("sleep_quality"),
-            sleep_notes=row.get("sleep_notes"),
-            symptoms=row.get("symptoms") or [],
-            symptom_severity=row.get("symptom_severity"),
-            symptom_notes=row.get("symptom_notes"),
-            created_at=row["created_at"],
-            updated_at=row.get("updated_at"),
-        )
+        """Map database row to DailyLog model
+
+        Every query selects exactly the DailyLog columns, so the row is
+        unpacked straight into the model. Column types already match the
+        model (psycopg2 returns uuid columns as str), so validation is
+        skipped.
+        """
+        row["symptoms"] = row["symptoms"] or []
+        return DailyLog.model_construct(**row)
 
 
 # Singleton instance
@@ -1,42 +1,127 @@
+"""
+ChromaDB Service
+
+Vector memory for the agent (add/search/get/delete memories) plus the
+training-plan session store carried over from the original prototype.
+
+The session methods use Chroma metadata as a row store. No route, tool or
+agent calls them today, so they stay here rather than gaining Postgres
+tables nobody reads; if the sessions are ever wired up they belong in
+Postgres next to daily_logs, leaving Chroma for vector recall only.
+"""
+
 import chromadb
 from chromadb.config import Settings
 from pathlib import Path
+import asyncio
 import os
-import json
+import orjson
+import threading
+import uuid
+from cachetools import TTLCache
+from dataclasses import asdict, dataclass
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 
+# Chroma server mode: set CHROMA_HOST to talk to a `chroma run` sidecar instead
+# of opening the on-disk store inside the API process
+CHROMA_HOST = os.getenv('CHROMA_HOST')
+CHROMA_PORT = int(os.getenv('CHROMA_PORT', 8000))
+
+# JSON-encoded session metadata fields and factories for their empty values
+_JSON_FIELD_DEFAULTS = {
+    "calendar": lambda: {"events": []},
+    "weather": lambda: {"hours": []},
+    "time_scheduled": list,
+    "data_points": lambda: {"laps": []},
+}
+
+# Sessions per collection.add call when storing a training plan
+_ADD_BATCH_SIZE = 250
+
+# Raw Chroma read results are reused briefly; any write clears the cache
+_READ_CACHE_TTL_SECONDS = 30
+
+@dataclass(slots=True)
+class SessionView:
+    """One day of the weekly session summary"""
+    date: str
+    day_name: str
+    session_type: str
+    planned_distance: float
+    actual_distance: float
+    session_completed: bool
+    has_activity: bool
+    is_today: bool
+
+@dataclass(slots=True)
+class MemoryHit:
+    """One search_memories result"""
+    id: str
+    text: str
+    metadata: Optional[Dict[str, Any]]
+    distance: Optional[float]
+
 class ChromaService:
+    _JSON_FIELDS = tuple(_JSON_FIELD_DEFAULTS)
+
     def __init__(self):
-        # Get the absolute path to the app directory
-        APP_DIR = Path(__file__).parent.parent
-        DB_DIR = APP_DIR / "data" / "chroma"
-        
-        # Create the database directory if it doesn't exist
-        DB_DIR.mkdir(parents=True, exist_ok=True)
-        
-        # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(
-            path=str(DB_DIR),
-            settings=Settings(
-                anonymized_telemetry=False,
-                allow_reset=True
-                #is_persistent=True
+        if CHROMA_HOST:
+            # Server mode: the Chroma server owns persistence
+            self.client = chromadb.HttpClient(
+                host=CHROMA_HOST,
+                port=CHROMA_PORT,
+                settings=Settings(anonymized_telemetry=False)
+            )
+        else:
+            # Get the absolute path to the app directory
+            APP_DIR = Path(__file__).parent.parent
+            DB_DIR = APP_DIR / "data" / "chroma"
+            
+            # Create the database directory if it doesn't exist
+            DB_DIR.mkdir(parents=True, exist_ok=True)
+            
+            # Initialize ChromaDB client
+            self.client = chromadb.PersistentClient(
+                path=str(DB_DIR),
+                settings=Settings(
+                    anonymized_telemetry=False,
+                    allow_reset=True
+                    #is_persistent=True
+                )
             )
-        )
-        
-        # Disable telemetry to avoid capture() error
-        try:
-            import chromadb.telemetry as telemetry_module
-            telemetry_module.TelemetryClient = None
-        except:
-            pass
         
         # Create or get the main collection
         self.collection = self.client.get_or_create_collection(
             name="agent_memory",
             metadata={"description": "Memory storage for AI agents"}
         )
+
+        self._read_cache = TTLCache(maxsize=256, ttl=_READ_CACHE_TTL_SECONDS)
+        self._read_cache_lock = threading.Lock()
+
+        # Warm-up read so the first real request doesn't pay for loading the index
+        self.collection.get(limit=1, include=[])
+
+    def _cached_read(self, key: tuple, loader):
+        """Return a cached Chroma read result, loading it on a miss.
+
+        Cached results are shared, so callers must not mutate them.
+        """
+        with self._read_cache_lock:
+            if key in self._read_cache:
+                return self._read_cache[key]
+
+        value = loader()
+        with self._read_cache_lock:
+            self._read_cache[key] = value
+        return value
+
+    def _invalidate_reads(self):
+        """Drop cached reads after the collection changes."""
+        with self._read_cache_lock:
+            self._read_cache.clear()
     
     def add_memory(self, 
                    text: str, 
@@ -46,8 +131,8 @@ class ChromaService:
         if metadata is None:
             metadata = {}
             
-        # Generate a unique ID for the memory
-        memory_id = f"memory_{len(self.collection.get()['ids']) + 1}"
+        # Generate a unique ID for the memory without scanning the collection
+        memory_id = f"memory_{uuid.uuid4().hex}"
         
         # Add the memory to the collection
         self.collection.add(
@@ -56,6 +141,7 @@ class ChromaService:
             ids=[memory_id],
             embeddings=[embedding] if embedding else None
         )
+        self._invalidate_reads()
         
         return memory_id
     
@@ -71,22 +157,23 @@ class ChromaService:
         )
         
         # Format the results
-        memories = []
-        for i in range(len(results['ids'][0])):
-            memory = {
-                'id': results['ids'][0][i],
-                'text': results['documents'][0][i],
-                'metadata': results['metadatas'][0][i],
-                'distance': results['distances'][0][i] if 'distances' in results else None
-            }
-            memories.append(memory)
+        distances = results.get('distances')
+        hits = [
+            MemoryHit(
+                id=results['ids'][0][i],
+                text=results['documents'][0][i],
+                metadata=results['metadatas'][0][i],
+                distance=distances[0][i] if distances else None
+            )
+            for i in range(len(results['ids'][0]))
+        ]
             
-        return memories
+        return [asdict(hit) for hit in hits]
     
     def get_memory(self, memory_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific memory by ID"""
         try:
-            result = self.collection.get(ids=[memory_id])
+            result = self.collection.get(ids=[memory_id], include=["documents", "metadatas"])
             if not result['ids']:
                 return None
                 
@@ -102,6 +189,7 @@ class ChromaService:
         """Delete a memory by ID"""
         try:
             self.collection.delete(ids=[memory_id])
+            self._invalidate_reads()
             return True
         except Exception:
             return False
@@ -120,56 +208,54 @@ class ChromaService:
             # Generate unique IDs for each session
             ids = [f"session_{i:03d}" for i in range(1, len(sessions) + 1)]
             
-            # Create document strings for each session
+            # Build document strings and metadata for each session in one pass
             documents = []
-            for session in sessions:
-                doc = f"Session planned for {session['date']}, {session['distance']} {session['type']}"
-                if session.get('notes'):
-                    doc += f", {session['notes']}"
-                documents.append(doc)
-            
-            # Prepare metadata for each session with new structure
             metadatas = []
             for session in sessions:
-                session_metadata = {
-                    "date": session["date"],
+                date = session["date"]
+                distance = session["distance"]
+                session_type = session["type"]
+                notes = session.get("notes", "")
+
+                doc = f"Session planned for {date}, {distance} {session_type}"
+                documents.append(f"{doc}, {notes}" if notes else doc)
+                metadatas.append({
+                    "date": date,
                     "day": session["day"],
-                    "type": session["type"],
-                    "distance": session["distance"],
-                    "notes": session.get("notes", ""),
-                    # New fields with default empty values (serialized as JSON strings)
-                    "calendar": json.dumps({
-                        "events": []
-                    }),
-                    "weather": json.dumps({
-                        "hours": []
-                    }),
-                    "time_scheduled": json.dumps([]),
-                    "data_points": json.dumps({
-                        "laps": []
-                    }),
+                    "type": session_type,
+                    "distance": distance,
+                    "notes": notes,
+                    # calendar/weather/time_scheduled/data_points are only
+                    # stored once set; readers fill in the empty defaults
                     "session_completed": False
-                }
-                metadatas.append(session_metadata)
+                })
             
-            # Add the sessions to the collection
-            try:
-                self.collection.add(
-                    ids=ids,
-                    documents=documents,
-                    metadatas=metadatas
-                )
-                print(f"Successfully stored {len(sessions)} training plan sessions")
-                return "success"
-            except Exception as add_error:
-                # Check if it's a telemetry error (non-critical)
-                if "telemetry" in str(add_error).lower() or "capture()" in str(add_error):
-                    print(f"ChromaDB telemetry warning (non-critical): {str(add_error)}")
-                    # Still return success since the data was likely stored
-                    return "success"
-                else:
-                    # Re-raise non-telemetry errors
-                    raise add_error
+            # Add the sessions in batches; a failed batch doesn't stop the rest
+            failures = []
+            for start in range(0, len(ids), _ADD_BATCH_SIZE):
+                end = start + _ADD_BATCH_SIZE
+                try:
+                    self.collection.add(
+                        ids=ids[start:end],
+                        documents=documents[start:end],
+                        metadatas=metadatas[start:end]
+                    )
+                except Exception as add_error:
+                    # Check if it's a telemetry error (non-critical)
+                    if "telemetry" in str(add_error).lower() or "capture()" in str(add_error):
+                        # The batch was likely stored
+                        print(f"ChromaDB telemetry warning (non-critical): {str(add_error)}")
+                    else:
+                        failures.append(f"sessions {start + 1}-{min(end, len(ids))}: {add_error}")
+
+            self._invalidate_reads()
+
+            if failures:
+                print(f"Error storing training plan: {'; '.join(failures)}")
+                return "; ".join(failures)
+
+            print(f"Successfully stored {len(sessions)} training plan sessions")
+            return "success"
             
         except Exception as e:
             print(f"Error storing training plan: {str(e)}")
@@ -188,41 +274,71 @@ class ChromaService:
         
 
 
-    def update_session_calendar(self, session_id: str, calendar_events: List[Dict]) -> bool:
-        """Update calendar events for a specific session.
+    def batch_update_sessions(self, updates: Dict[str, Dict]) -> bool:
+        """Apply metadata updates to several sessions with a single update call.
+        
+        Only the changed keys are sent; Chroma merges them into the stored
+        metadata, so the current values don't need to be read first. Unknown
+        session IDs are ignored by Chroma and still count as success; the
+        single-session setters check existence first. Dict and list values
+        are serialized as JSON strings, matching how the calendar, weather,
+        time_scheduled and data_points fields are stored.
         
         Args:
-            session_id: The session ID to update
-            calendar_events: List of calendar events
+            updates: Mapping of session ID to the metadata fields to update
             
         Returns:
-            bool: True if successful, False otherwise
+            bool: True if successful, False if the update fails
         """
+        if not updates:
+            return True
+
         try:
-            # Get current session metadata
-            result = self.collection.get(ids=[session_id])
-            if not result['ids']:
-                return False
-            
-            current_metadata = result['metadatas'][0]
-            
-            # Update calendar events
-            current_metadata['calendar'] = json.dumps({
-                "events": calendar_events
-            })
-            
-            # Update the session
+            ids = list(updates)
+            metadatas = [
+                {
+                    key: orjson.dumps(value).decode() if isinstance(value, (dict, list)) else value
+                    for key, value in updates[session_id].items()
+                }
+                for session_id in ids
+            ]
+
             self.collection.update(
-                ids=[session_id],
-                metadatas=[current_metadata]
+                ids=ids,
+                metadatas=metadatas
             )
+            self._invalidate_reads()
             
             return True
             
         except Exception as e:
-            print(f"Error updating session calendar: {str(e)}")
+            print(f"Error updating sessions: {str(e)}")
+            return False
+
+    def _update_session(self, session_id: str, fields: Dict) -> bool:
+        """Update one session's metadata, returning False if it doesn't exist."""
+        try:
+            # IDs only; no documents, metadata or embeddings are loaded
+            if not self.collection.get(ids=[session_id], include=[])['ids']:
+                return False
+        except Exception as e:
+            print(f"Error updating session: {str(e)}")
             return False
 
+        return self.batch_update_sessions({session_id: fields})
+
+    def update_session_calendar(self, session_id: str, calendar_events: List[Dict]) -> bool:
+        """Update calendar events for a specific session.
+        
+        Args:
+            session_id: The session ID to update
+            calendar_events: List of calendar events
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        return self._update_session(session_id, {"calendar": {"events": calendar_events}})
+
     def update_session_weather(self, session_id: str, weather_data: Dict) -> bool:
         """Update weather data for a specific session.
         
@@ -233,28 +349,7 @@ class ChromaService:
         Returns:
             bool: True if successful, False otherwise
         """
-        try:
-            # Get current session metadata
-            result = self.collection.get(ids=[session_id])
-            if not result['ids']:
-                return False
-            
-            current_metadata = result['metadatas'][0]
-            
-            # Update weather data
-            current_metadata['weather'] = json.dumps(weather_data)
-            
-            # Update the session
-            self.collection.update(
-                ids=[session_id],
-                metadatas=[current_metadata]
-            )
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error updating session weather: {str(e)}")
-            return False
+        return self._update_session(session_id, {"weather": weather_data})
 
     def update_session_time_scheduled(self, session_id: str, time_scheduled: List[Dict]) -> bool:
         """Update time scheduling for a specific session.
@@ -266,28 +361,7 @@ class ChromaService:
         Returns:
             bool: True if successful, False otherwise
         """
-        try:
-            # Get current session metadata
-            result = self.collection.get(ids=[session_id])
-            if not result['ids']:
-                return False
-            
-            current_metadata = result['metadatas'][0]
-            
-            # Update time scheduled
-            current_metadata['time_scheduled'] = json.dumps(time_scheduled)
-            
-            # Update the session
-            self.collection.update(
-                ids=[session_id],
-                metadatas=[current_metadata]
-            )
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error updating session time scheduled: {str(e)}")
-            return False
+        return self._update_session(session_id, {"time_scheduled": time_scheduled})
 
     def update_session_status(self, session_id: str, session_completed: bool) -> bool:
         """Update session completion status.
@@ -299,28 +373,7 @@ class ChromaService:
         Returns:
             bool: True if successful, False otherwise
         """
-        try:
-            # Get current session metadata
-            result = self.collection.get(ids=[session_id])
-            if not result['ids']:
-                return False
-            
-            current_metadata = result['metadatas'][0]
-            
-            # Update session completion status
-            current_metadata['session_completed'] = session_completed
-            
-            # Update the session
-            self.collection.update(
-                ids=[session_id],
-                metadatas=[current_metadata]
-            )
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error updating session status: {str(e)}")
-            return False
+        return self._update_session(session_id, {"session_completed": session_completed})
 
     def update_session_metadata(self, session_id: str, updates: Dict) -> bool:
         """Update multiple metadata fields for a specific session.
@@ -332,61 +385,40 @@ class ChromaService:
         Returns:
             bool: True if successful, False otherwise
         """
-        try:
-            # Get current session metadata
-            result = self.collection.get(ids=[session_id])
-            if not result['ids']:
-                return False
-            
-            current_metadata = result['metadatas'][0]
-            
-            # Update the metadata with new values
-            current_metadata.update(updates)
-            
-            # Update the session
-            self.collection.update(
-                ids=[session_id],
-                metadatas=[current_metadata]
-            )
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error updating session metadata: {str(e)}")
-            return False
+        return self._update_session(session_id, updates)
+
+    async def add_memory_async(self,
+                               text: str,
+                               metadata: Optional[Dict[str, Any]] = None,
+                               embedding: Optional[List[float]] = None) -> str:
+        """Async variant of add_memory; runs the write in a worker thread."""
+        return await asyncio.to_thread(self.add_memory, text, metadata, embedding)
+
+    async def store_training_plan_async(self, sessions: List[Dict], metadata: Dict) -> str:
+        """Async variant of store_training_plan; runs the write in a worker thread."""
+        return await asyncio.to_thread(self.store_training_plan, sessions, metadata)
+
+    async def batch_update_sessions_async(self, updates: Dict[str, Dict]) -> bool:
+        """Async variant of batch_update_sessions; runs the write in a worker thread."""
+        return await asyncio.to_thread(self.batch_update_sessions, updates)
 
     def _deserialize_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """Helper method to deserialize JSON strings in metadata back to objects."""
         try:
+            # Copy: metadata may belong to a cached Chroma result
             deserialized = metadata.copy()
-            
-            # Deserialize calendar events
-            if 'calendar' in deserialized and isinstance(deserialized['calendar'], str):
-                try:
-                    deserialized['calendar'] = json.loads(deserialized['calendar'])
-                except json.JSONDecodeError:
-                    deserialized['calendar'] = {"events": []}
-            
-            # Deserialize weather data
-            if 'weather' in deserialized and isinstance(deserialized['weather'], str):
-                try:
-                    deserialized['weather'] = json.loads(deserialized['weather'])
-                except json.JSONDecodeError:
-                    deserialized['weather'] = {"hours": []}
-            
-            # Deserialize time scheduled
-            if 'time_scheduled' in deserialized and isinstance(deserialized['time_scheduled'], str):
-                try:
-                    deserialized['time_scheduled'] = json.loads(deserialized['time_scheduled'])
-                except json.JSONDecodeError:
-                    deserialized['time_scheduled'] = []
-            
-            # Deserialize data_points
-            if 'data_points' in deserialized and isinstance(deserialized['data_points'], str):
-                try:
-                    deserialized['data_points'] = json.loads(deserialized['data_points'])
-                except json.JSONDecodeError:
-                    deserialized['data_points'] = {"laps": []}
+
+            # JSON fields are absent until first set, so missing or
+            # undecodable values fall back to their empty default
+            for field in self._JSON_FIELDS:
+                value = deserialized.get(field)
+                if value is None:
+                    deserialized[field] = _JSON_FIELD_DEFAULTS[field]()
+                elif isinstance(value, str):
+                    try:
+                        deserialized[field] = orjson.loads(value)
+                    except orjson.JSONDecodeError:
+                        deserialized[field] = _JSON_FIELD_DEFAULTS[field]()
             
             return deserialized
         except Exception as e:
@@ -396,14 +428,16 @@ class ChromaService:
     def get_session_by_date(self, date: str) -> List[Dict]:
         """Get sessions from a specific date IN THE FORMAT YYYY-MM-DD"""
         try:
-            results = self.collection.get(where={"date": date})
-            
-            # Deserialize JSON strings in metadata
-            if results and 'metadatas' in results:
-                for i, metadata in enumerate(results['metadatas']):
-                    results['metadatas'][i] = self._deserialize_metadata(metadata)
+            results = self._cached_read(
+                ("session_by_date", date),
+                lambda: self.collection.get(where={"date": date}, include=["documents", "metadatas"])
+            )
             
-            return results
+            # Deserialize JSON strings in metadata (into a copy; results are cached)
+            return {
+                **results,
+                'metadatas': [self._deserialize_metadata(metadata) for metadata in results['metadatas']]
+            }
         except Exception as e:
             print(f"Error retrieving today's sessions: {str(e)}")
             return []
@@ -422,8 +456,6 @@ class ChromaService:
                 - message: Description of the result
         """
         try:
-            from datetime import datetime, timedelta
-            
             # Validate start_date format
             try:
                 start_dt = datetime.strptime(start_date, "%Y-%m-%d")
@@ -447,34 +479,27 @@ class ChromaService:
             start_date_of_week = monday_dt.strftime("%Y-%m-%d")
             end_date_of_week = sunday_dt.strftime("%Y-%m-%d")
             
-            # Get all sessions for the week by querying each day individually
-            daily_sessions = {}
-            
-            for i in range(7):
-                current_date = (monday_dt + timedelta(days=i)).strftime("%Y-%m-%d")
-                
-                # Get sessions for this specific date
-                results = self.collection.get(
-                    where={"date": current_date}
+            week_days = [monday_dt + timedelta(days=i) for i in range(7)]
+            dates = [day.strftime("%Y-%m-%d") for day in week_days]
+            day_names = [day.strftime("%A") for day in week_days]
+
+            # Get all sessions for the week in one query, then bucket by date
+            results = self._cached_read(
+                ("weekly_sessions", start_date_of_week),
+                lambda: self.collection.get(
+                    where={"date": {"$in": dates}},
+                    include=["documents", "metadatas"]
                 )
-                
-                # Check if we have any results for this date
-                if (results and 'ids' in results and results['ids'] and 
-                    len(results['ids']) > 0):
-                    
-                    # Deserialize JSON strings in metadata
-                    if 'metadatas' in results and results['metadatas'] and len(results['metadatas']) > 0:
-                        for j, metadata in enumerate(results['metadatas']):
-                            results['metadatas'][j] = self._deserialize_metadata(metadata)
-                    
-                    # Process the results for this date
-                    for j in range(len(results['ids'])):
-                        session_date = results['metadatas'][j].get('date', '')
-                        daily_sessions[session_date] = {
-                            'id': results['ids'][j],
-                            'session': results['documents'][j],
-                            'metadata': results['metadatas'][j]
-                        }
+            )
+
+            daily_sessions = {}
+            for session_id, document, metadata in zip(results['ids'], results['documents'], results['metadatas']):
+                metadata = self._deserialize_metadata(metadata)
+                daily_sessions[metadata.get('date', '')] = {
+                    'id': session_id,
+                    'session': document,
+                    'metadata': metadata
+                }
             
             # Create a complete week structure (Monday to Sunday)
             week_data = []
@@ -483,10 +508,9 @@ class ChromaService:
             total_sessions = 0
             completed_sessions = 0
             
-            for i in range(7):
-                current_date = (monday_dt + timedelta(days=i)).strftime("%Y-%m-%d")
-                day_name = (monday_dt + timedelta(days=i)).strftime("%A")
-                
+            today = datetime.now().strftime("%Y-%m-%d")
+
+            for current_date, day_name in zip(dates, day_names):
                 if current_date in daily_sessions:
                     session_data = daily_sessions[current_date]
                     metadata = session_data['metadata']
@@ -506,28 +530,28 @@ class ChromaService:
                     if session_completed:
                         completed_sessions += 1
                     
-                    week_data.append({
-                        'date': current_date,
-                        'day_name': day_name,
-                        'session_type': session_type,
-                        'planned_distance': planned_distance,
-                        'actual_distance': actual_distance,
-                        'session_completed': session_completed,
-                        'has_activity': session_type != 'Rest Day' and actual_distance > 0,
-                        'is_today': current_date == datetime.now().strftime("%Y-%m-%d")
-                    })
+                    week_data.append(SessionView(
+                        date=current_date,
+                        day_name=day_name,
+                        session_type=session_type,
+                        planned_distance=planned_distance,
+                        actual_distance=actual_distance,
+                        session_completed=session_completed,
+                        has_activity=session_type != 'Rest Day' and actual_distance > 0,
+                        is_today=current_date == today
+                    ))
                 else:
                     # No session data for this day
-                    week_data.append({
-                        'date': current_date,
-                        'day_name': day_name,
-                        'session_type': 'No Session',
-                        'planned_distance': 0,
-                        'actual_distance': 0,
-                        'session_completed': False,
-                        'has_activity': False,
-                        'is_today': current_date == datetime.now().strftime("%Y-%m-%d")
-                    })
+                    week_data.append(SessionView(
+                        date=current_date,
+                        day_name=day_name,
+                        session_type='No Session',
+                        planned_distance=0,
+                        actual_distance=0,
+                        session_completed=False,
+                        has_activity=False,
+                        is_today=current_date == today
+                    ))
             
             # Create weekly summary
             summary = {
@@ -542,7 +566,7 @@ class ChromaService:
             
             return {
                 "status": "success",
-                "data": week_data,
+                "data": [asdict(day) for day in week_data],
                 "summary": summary,
                 "message": f"Weekly data retrieved for {start_date_of_week} to {end_date_of_week}"
             }
@@ -562,19 +586,27 @@ class ChromaService:
             today = datetime.now()
             end_date = (today + timedelta(days=days)).strftime("%Y-%m-%d")
             
-            results = self.collection.query(
-                where={
-                    "date": {
-                        "$gte": today.strftime("%Y-%m-%d"),
-                        "$lte": end_date
+            start_date = today.strftime("%Y-%m-%d")
+            results = self._cached_read(
+                ("upcoming_sessions", start_date, end_date),
+                lambda: self.collection.query(
+                    where={
+                        "date": {
+                            "$gte": start_date,
+                            "$lte": end_date
+                        }
                     }
-                }
+                )
             )
             
-            # Deserialize JSON strings in metadata
-            if results and 'metadatas' in results and results['metadatas']:
-                for i, metadata in enumerate(results['metadatas'][0]):
-                    results['metadatas'][0][i] = self._deserialize_metadata(metadata)
+            # Deserialize JSON strings in metadata (into a copy; results are cached)
+            if results and results.get('metadatas'):
+                results = {
+                    **results,
+                    'metadatas': [
+                        [self._deserialize_metadata(metadata) for metadata in results['metadatas'][0]]
+                    ]
+                }
             
             return results
         except Exception as e:
@@ -592,7 +624,10 @@ class ChromaService:
         """
         try:
             # Get all data from the collection
-            results = self.collection.get()
+            results = self._cached_read(
+                ("all_sessions",),
+                lambda: self.collection.get(include=["documents", "metadatas"])
+            )
             
             if not results:
                 return {
@@ -603,15 +638,14 @@ class ChromaService:
                 }
             
             # Format the results and deserialize metadata
-            sessions = []
-            for i in range(len(results['ids'])):
-                metadata = self._deserialize_metadata(results['metadatas'][i])
-                session = {
-                    "id": results['ids'][i],
-                    "document": results['documents'][i],
-                    "metadata": metadata
+            sessions = [
+                {
+                    "id": session_id,
+                    "document": document,
+                    "metadata": self._deserialize_metadata(metadata)
                 }
-                sessions.append(session)
+                for session_id, document, metadata in zip(results['ids'], results['documents'], results['metadatas'])
+            ]
             
             return {
                 "status": "success",
@@ -643,7 +677,7 @@ class ChromaService:
         """
         try:
             activity_id_str = str(activity_id)
-            results = self.collection.get(ids=[activity_id_str])
+            results = self.collection.get(ids=[activity_id_str], include=["metadatas"])
             
             if not results['ids']:
                 return {
@@ -652,14 +686,13 @@ class ChromaService:
                     "activity_data": None
                 }
             
-            # Reconstruct the activity data structure
-            document = results['documents'][0]
+            # Reconstruct the activity data structure (only metadata is needed)
             metadata = results['metadatas'][0]
             
             # Parse data_points separately to avoid duplication
             data_points = {}
             if metadata.get("data_points"):
-                data_points = json.loads(metadata["data_points"])
+                data_points = orjson.loads(metadata["data_points"])
                 # Remove data_points from metadata to avoid duplication
                 del metadata["data_points"]
             
@@ -682,5 +715,8 @@ class ChromaService:
                 "activity_data": None
             }
 
-# Create a singleton instance
-chroma_service = ChromaService() 
\ No newline at end of file
+# Singleton instance, created on first use: opening the client loads the
+# on-disk store, which importers that never touch Chroma shouldn't pay for
+@lru_cache(maxsize=1)
+def get_chroma_service() -> ChromaService:
+    return ChromaService() 
\ No newline at end of file
@@ -0,0 +1,20 @@
+-- At most one daily greeting per user per day.
+-- Backs the ON CONFLICT clause in chat.services.save_daily_greeting so that
+-- concurrent greeting requests cannot store duplicates.
+
+-- Greetings used to be checked for and inserted without a lock, so
+-- concurrent requests may already have stored more than one per day. Keep
+-- the earliest of each, otherwise the unique index below cannot be built.
+DELETE FROM chat_messages AS dup
+USING chat_messages AS kept
+WHERE dup.role = 'system'
+  AND (dup.metadata->>'is_greeting') = 'true'
+  AND kept.role = 'system'
+  AND (kept.metadata->>'is_greeting') = 'true'
+  AND kept.user_id = dup.user_id
+  AND kept.message_date = dup.message_date
+  AND (kept.created_at, kept.id) < (dup.created_at, dup.id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_chat_messages_daily_greeting
+    ON chat_messages (user_id, message_date)
+    WHERE role = 'system' AND (metadata->>'is_greeting') = 'true';
@@ -0,0 +1,4 @@
+-- Keyset pagination for chat history (chat.services.get_recent_messages):
+-- WHERE user_id = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC
+CREATE INDEX IF NOT EXISTS idx_chat_messages_user_created
+    ON chat_messages (user_id, created_at DESC, id DESC);
@@ -0,0 +1,20 @@
+-- Natural meal ordering as a stored column so summaries can ORDER BY a plain
+-- column instead of a CASE expression, and read meals in index order:
+-- WHERE user_id = ? AND log_date = ? ORDER BY meal_type_order
+-- lower() covers both the UI's 'Breakfast'/'Snack 1' labels and older
+-- lowercase values written by the agent.
+ALTER TABLE meals
+    ADD COLUMN IF NOT EXISTS meal_type_order SMALLINT GENERATED ALWAYS AS (
+        CASE lower(meal_type)
+            WHEN 'breakfast' THEN 1
+            WHEN 'snack 1' THEN 2
+            WHEN 'lunch' THEN 3
+            WHEN 'snack 2' THEN 4
+            WHEN 'dinner' THEN 5
+            WHEN 'snacks' THEN 6
+            ELSE 7
+        END
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_meals_user_date_order
+    ON meals (user_id, log_date, meal_type_order);
@@ -0,0 +1,8 @@
+-- Substring food search (meals.service.MealService.search_foods):
+-- WHERE name ILIKE '%query%'
+-- A trigram GIN index serves ILIKE directly; keep the query on the bare
+-- column (no lower()) or the index is not used.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_foods_name_trgm
+    ON foods USING gin (name gin_trgm_ops);
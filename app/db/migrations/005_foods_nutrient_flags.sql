@@ -0,0 +1,59 @@
+-- Nutrient presence stored on foods so read paths (meals.service) select
+-- plain columns instead of aggregating food_nutrients per food.
+-- food_nutrients stays the source of truth; the trigger below keeps the
+-- flags in sync with it.
+ALTER TABLE foods
+    ADD COLUMN IF NOT EXISTS has_calcium BOOLEAN NOT NULL DEFAULT false,
+    ADD COLUMN IF NOT EXISTS has_iron BOOLEAN NOT NULL DEFAULT false,
+    ADD COLUMN IF NOT EXISTS has_folate BOOLEAN NOT NULL DEFAULT false,
+    ADD COLUMN IF NOT EXISTS has_protein BOOLEAN NOT NULL DEFAULT false,
+    ADD COLUMN IF NOT EXISTS has_vitamin_d BOOLEAN NOT NULL DEFAULT false,
+    ADD COLUMN IF NOT EXISTS has_dha BOOLEAN NOT NULL DEFAULT false,
+    ADD COLUMN IF NOT EXISTS has_fiber BOOLEAN NOT NULL DEFAULT false;
+
+CREATE OR REPLACE FUNCTION refresh_food_nutrient_flags(target_food_id foods.id%TYPE)
+RETURNS void AS $$
+    UPDATE foods f SET
+        has_calcium = coalesce(x.has_calcium, false),
+        has_iron = coalesce(x.has_iron, false),
+        has_folate = coalesce(x.has_folate, false),
+        has_protein = coalesce(x.has_protein, false),
+        has_vitamin_d = coalesce(x.has_vitamin_d, false),
+        has_dha = coalesce(x.has_dha, false),
+        has_fiber = coalesce(x.has_fiber, false)
+    FROM (
+        SELECT
+            bool_or(n.name = 'calcium') AS has_calcium,
+            bool_or(n.name = 'iron') AS has_iron,
+            bool_or(n.name = 'folate') AS has_folate,
+            bool_or(n.name = 'protein') AS has_protein,
+            bool_or(n.name = 'vitamin_d') AS has_vitamin_d,
+            bool_or(n.name = 'dha') AS has_dha,
+            bool_or(n.name = 'fiber') AS has_fiber
+        FROM food_nutrients fn
+        JOIN nutrients n ON fn.nutrient_id = n.id
+        WHERE fn.food_id = target_food_id AND fn.is_present = true
+    ) x
+    WHERE f.id = target_food_id;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION food_nutrients_sync_flags()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM refresh_food_nutrient_flags(OLD.food_id);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM refresh_food_nutrient_flags(NEW.food_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_food_nutrients_sync_flags ON food_nutrients;
+CREATE TRIGGER trg_food_nutrients_sync_flags
+    AFTER INSERT OR UPDATE OR DELETE ON food_nutrients
+    FOR EACH ROW EXECUTE FUNCTION food_nutrients_sync_flags();
+
+-- Backfill existing foods
+SELECT refresh_food_nutrient_flags(id) FROM foods;
@@ -0,0 +1,10 @@
+-- Week/range reads (meals.service.MealService.get_meals_by_date_range) walk
+-- meals by (user_id, log_date, meal_type), which the unique key required by
+-- upsert_meal's ON CONFLICT (user_id, log_date, meal_type) already indexes.
+-- Their items are then read per meal in sort_order:
+CREATE INDEX IF NOT EXISTS idx_meal_items_meal_sort
+    ON meal_items (meal_id, sort_order);
+
+-- Present nutrients per food, as read by refresh_food_nutrient_flags
+CREATE INDEX IF NOT EXISTS idx_food_nutrients_food_present
+    ON food_nutrients (food_id) WHERE is_present;
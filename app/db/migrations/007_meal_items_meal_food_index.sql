@@ -0,0 +1,13 @@
+-- The agent tools join meals -> meal_items -> foods for a user's week.
+-- meals is already covered by its (user_id, log_date, meal_type) unique key
+-- and daily_logs by (user_id, log_date), so both range and point lookups on
+-- user_id + log_date are index scans. What was missing is food_id on the
+-- meal_items index: carrying it lets the join read items index-only while
+-- keeping the sort_order walk used by the week/range view.
+-- CONCURRENTLY avoids locking meal_items writes; run this file outside a
+-- transaction (plain psql -f, not --single-transaction).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_meal_items_meal_sort_food
+    ON meal_items (meal_id, sort_order) INCLUDE (food_id);
+
+-- Superseded by the index above
+DROP INDEX CONCURRENTLY IF EXISTS idx_meal_items_meal_sort;
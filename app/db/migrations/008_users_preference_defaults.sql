@@ -0,0 +1,27 @@
+-- users preference columns were nullable, so every read COALESCEd them back
+-- to the User model defaults. Backfill the NULLs and enforce the defaults in
+-- the schema so the user queries can select the columns as-is.
+-- Run before deploying the matching users/service.py change.
+BEGIN;
+
+UPDATE users
+SET dietary_restrictions = COALESCE(dietary_restrictions, '{}'::text[]),
+    preferred_unit = COALESCE(preferred_unit, 'metric'),
+    daily_caffeine_limit = COALESCE(daily_caffeine_limit, 200),
+    notification_opt_in = COALESCE(notification_opt_in, true)
+WHERE dietary_restrictions IS NULL
+   OR preferred_unit IS NULL
+   OR daily_caffeine_limit IS NULL
+   OR notification_opt_in IS NULL;
+
+ALTER TABLE users
+    ALTER COLUMN dietary_restrictions SET DEFAULT '{}'::text[],
+    ALTER COLUMN dietary_restrictions SET NOT NULL,
+    ALTER COLUMN preferred_unit SET DEFAULT 'metric',
+    ALTER COLUMN preferred_unit SET NOT NULL,
+    ALTER COLUMN daily_caffeine_limit SET DEFAULT 200,
+    ALTER COLUMN daily_caffeine_limit SET NOT NULL,
+    ALTER COLUMN notification_opt_in SET DEFAULT true,
+    ALTER COLUMN notification_opt_in SET NOT NULL;
+
+COMMIT;
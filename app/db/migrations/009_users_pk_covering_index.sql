@@ -0,0 +1,23 @@
+-- get_user_by_id / get_users_by_ids look users up by primary key and read
+-- every column users/service.py selects. Carrying those columns in an index
+-- on id lets Postgres answer the lookup with an index-only scan instead of
+-- following the primary key into the heap. users is small and rarely
+-- updated, so the extra copy of each row is cheap to keep.
+-- CONCURRENTLY and VACUUM cannot run inside a transaction; run this file
+-- with plain psql -f, not --single-transaction.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_pk_cover
+    ON users (id) INCLUDE (
+        email,
+        first_name,
+        due_date,
+        last_period_date,
+        dietary_restrictions,
+        preferred_unit,
+        daily_caffeine_limit,
+        notification_opt_in,
+        created_at,
+        updated_at
+    );
+
+-- Index-only scans need an up-to-date visibility map
+VACUUM (ANALYZE) users;
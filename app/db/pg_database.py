@@ -1,8 +1,16 @@
+import csv
+import io
 import os
-from typing import Optional, List, Dict, Any
+import re
+import threading
+from contextlib import ExitStack, contextmanager
+from itertools import groupby
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Sequence
+import orjson
 import psycopg2
 from psycopg2 import pool
-from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import connection as PGConnection, register_adapter
+from psycopg2.extras import Json, RealDictCursor, execute_values
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -29,31 +37,102 @@ else:
     }
     print("Using local PostgreSQL connection")
 
+# Fail fast instead of hanging a worker: bound connection setup and statement
+# run time (override with DB_CONNECT_TIMEOUT seconds / DB_STATEMENT_TIMEOUT_MS)
+DB_CONFIG['connect_timeout'] = int(os.getenv('DB_CONNECT_TIMEOUT', 2))
+DB_CONFIG['options'] = f"-c statement_timeout={int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 5000))}"
+DB_CONFIG['application_name'] = os.getenv('DB_APPLICATION_NAME', 'midwaife')
+
+# Serialize dict parameters (jsonb columns) with orjson instead of stdlib json
+def _orjson_dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+register_adapter(dict, lambda obj: Json(obj, dumps=_orjson_dumps))
+
+# Server-side prepared statements need a session-pinned connection; disable
+# when connecting through a transaction-mode pooler (e.g. PgBouncer :6543)
+USE_PREPARED_STATEMENTS = os.getenv('DB_PREPARED_STATEMENTS', 'true').lower() == 'true'
+
+class PreparingConnection(PGConnection):
+    """Connection that remembers which statements were prepared on it"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements = set()
+
+# Pool bounds; the minimum is opened with the pool and kept open, so bursts of
+# tool queries reuse warm connections instead of paying the TCP/TLS/auth
+# handshake (DB_POOL_MIN / DB_POOL_MAX)
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', 5))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', 20))
+
+# ThreadedConnectionPool raises PoolError as soon as all DB_POOL_MAX
+# connections are out. With up to 40 to_thread workers querying at once,
+# db_conn() queues for a free slot instead, giving up after
+# DB_POOL_TIMEOUT seconds.
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+
 # Create connection pool
-connection_pool: Optional[pool.SimpleConnectionPool] = None
+connection_pool: Optional[pool.ThreadedConnectionPool] = None
+_pool_lock = threading.Lock()
 
 def get_pool():
     """Get or create the connection pool"""
     global connection_pool
     if connection_pool is None:
-        connection_pool = pool.SimpleConnectionPool(
-            1,  # minconn
-            20,  # maxconn
-            **DB_CONFIG
-        )
+        with _pool_lock:
+            if connection_pool is None:
+                connection_pool = pool.ThreadedConnectionPool(
+                    DB_POOL_MIN,
+                    DB_POOL_MAX,
+                    connection_factory=PreparingConnection,
+                    **DB_CONFIG
+                )
     return connection_pool
 
 def get_db_connection():
-    """Get a connection from the pool"""
+    """Get a connection from the pool
+
+    Connections the client already knows are dead (psycopg2 marks them
+    closed after the server drops them) are discarded and replaced rather
+    than handed out to fail on first use.
+    """
     pool_instance = get_pool()
-    return pool_instance.getconn()
+    conn = pool_instance.getconn()
+    while conn.closed:
+        pool_instance.putconn(conn, close=True)
+        conn = pool_instance.getconn()
+    return conn
 
 def return_db_connection(conn):
     """Return a connection to the pool"""
     pool_instance = get_pool()
     pool_instance.putconn(conn)
 
-def execute_query(query: str, params: tuple = None, fetch_one: bool = False, fetch_all: bool = True):
+@contextmanager
+def db_conn():
+    """Borrow a pooled connection, rolling back on error and always returning it to the pool
+
+    Waits up to DB_POOL_TIMEOUT seconds for a connection when the pool is
+    fully checked out.
+    """
+    if not _pool_slots.acquire(timeout=DB_POOL_TIMEOUT):
+        raise pool.PoolError("timed out waiting for a database connection")
+    try:
+        conn = get_db_connection()
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            return_db_connection(conn)
+    finally:
+        _pool_slots.release()
+
+def execute_query(query: str, params: tuple = None, fetch_one: bool = False, fetch_all: bool = True,
+                  cursor_factory=RealDictCursor):
     """
     Execute a query and return results
 
@@ -62,68 +141,296 @@ def execute_query(query: str, params: tuple = None, fetch_one: bool = False, fet
         params: Query parameters tuple
         fetch_one: Return single row
         fetch_all: Return all rows
+        cursor_factory: Cursor class deciding the row type; None returns
+            plain tuples in SELECT-list order
 
     Returns:
         Query results as list of dicts or single dict
     """
-    conn = None
-    try:
-        conn = get_db_connection()
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    with db_conn() as conn:
+        with conn.cursor(cursor_factory=cursor_factory) as cursor:
             cursor.execute(query, params)
+            return _fetch_results(conn, cursor, fetch_one, fetch_all)
 
-            if fetch_one:
-                result = cursor.fetchone()
-                conn.commit()  # Commit for INSERT/UPDATE with RETURNING
-                return dict(result) if result else None
-            elif fetch_all:
-                results = cursor.fetchall()
-                conn.commit()  # Commit for any SELECT or INSERT/UPDATE with RETURNING
-                return [dict(row) for row in results]
-            else:
-                conn.commit()
-                return cursor.rowcount
+def execute_prepared(name: str, query: str, params: tuple = None, fetch_one: bool = False, fetch_all: bool = True,
+                     cursor_factory=RealDictCursor):
+    """
+    Execute a query as a server-side prepared statement
+
+    The statement is PREPAREd the first time it runs on a pooled connection
+    and EXECUTEd by name afterwards, so Postgres skips parsing and planning
+    on repeat calls. Takes the same %s-style query as execute_query.
 
-    except Exception as e:
-        if conn:
+    Args:
+        name: Statement name, unique per query text (reusing a name for
+            different SQL raises ValueError)
+        query: SQL query string with %s placeholders
+        params: Query parameters tuple
+        fetch_one: Return single row
+        fetch_all: Return all rows
+        cursor_factory: Cursor class deciding the row type, as in execute_query
+
+    Returns:
+        Query results as list of dicts or single dict
+    """
+    if not USE_PREPARED_STATEMENTS:
+        return execute_query(query, params, fetch_one=fetch_one, fetch_all=fetch_all,
+                             cursor_factory=cursor_factory)
+
+    prepare_sql, execute_sql = _prepared_sql(name, query)
+    with db_conn() as conn:
+        with conn.cursor(cursor_factory=cursor_factory) as cursor:
+            if name not in conn.prepared_statements:
+                cursor.execute(prepare_sql)
+                conn.prepared_statements.add(name)
+
+            cursor.execute(execute_sql, params)
+            return _fetch_results(conn, cursor, fetch_one, fetch_all)
+
+def execute_values_query(query: str, rows: List[tuple], template: Optional[str] = None, page_size: int = 500) -> List[Dict[str, Any]]:
+    """
+    Insert many rows with a single multi-row VALUES statement
+
+    Args:
+        query: SQL query with a single VALUES %s placeholder
+        rows: List of parameter tuples, one per row
+        template: Optional per-row template, e.g. "(%s, %s)"
+        page_size: Maximum rows sent per statement
+
+    Returns:
+        RETURNING rows as list of dicts
+    """
+    if not rows:
+        return []
+
+    with db_conn() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            results = execute_values(cursor, query, rows, template=template, page_size=page_size, fetch=True)
+            conn.commit()
+            return results
+
+def stream_query(query: str, params: tuple = None, batch_size: int = 1000,
+                 cursor_factory=RealDictCursor) -> Iterator[list]:
+    """
+    Stream a large result set in batches through a server-side cursor
+
+    Rows stay on the server and are fetched batch_size at a time, so memory
+    is bounded by one batch rather than the whole result. The pooled
+    connection is held until the generator is exhausted or closed.
+
+    Args:
+        query: SQL query string
+        params: Query parameters tuple
+        batch_size: Rows fetched per round trip
+        cursor_factory: Cursor class deciding the row type, as in execute_query
+
+    Yields:
+        Lists of up to batch_size rows
+    """
+    with db_conn() as conn:
+        try:
+            with conn.cursor(name='stream_query', cursor_factory=cursor_factory) as cursor:
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+        finally:
+            # Read-only; also ends the transaction if the caller stopped early
             conn.rollback()
-        raise e
-    finally:
-        if conn:
-            return_db_connection(conn)
+
+# name -> (query, PREPARE sql, EXECUTE sql), built on first use of each name.
+# Which names are prepared on a given connection is tracked on the connection
+# itself, so that state goes away with it (including on close_pool()).
+_prepared_statements: Dict[str, tuple] = {}
+
+def _prepared_sql(name: str, query: str) -> tuple:
+    """Get the PREPARE/EXECUTE statements for a name, registering it on first use"""
+    entry = _prepared_statements.get(name)
+    if entry is None:
+        placeholder_count = query.count('%s')
+        execute_sql = f'EXECUTE {name} ({", ".join(["%s"] * placeholder_count)})' if placeholder_count else f'EXECUTE {name}'
+        entry = _prepared_statements.setdefault(
+            name,
+            (query, f'PREPARE {name} AS {_to_server_placeholders(query)}', execute_sql)
+        )
+
+    if entry[0] is not query and entry[0] != query:
+        raise ValueError(f"Prepared statement '{name}' is already registered with different SQL")
+    return entry[1], entry[2]
+
+def _to_server_placeholders(query: str) -> str:
+    """Rewrite %s placeholders as the $1, $2, ... form PREPARE expects"""
+    parts = query.split('%s')
+    numbered = [part + f'${i}' for i, part in enumerate(parts[:-1], start=1)]
+    return ''.join(numbered) + parts[-1]
+
+def _fetch_results(conn, cursor, fetch_one: bool, fetch_all: bool):
+    """Collect results from an executed cursor and commit
+
+    RealDictCursor rows are already dicts, so they are returned as-is
+    rather than copied.
+    """
+    if fetch_one:
+        result = cursor.fetchone()
+        conn.commit()  # Commit for INSERT/UPDATE with RETURNING
+        return result
+    elif fetch_all:
+        results = cursor.fetchall()
+        conn.commit()  # Commit for any SELECT or INSERT/UPDATE with RETURNING
+        return results
+    else:
+        conn.commit()
+        return cursor.rowcount
+
+# Splits "INSERT ... VALUES (%s, %s) [tail]" into head, row template and tail
+_VALUES_ROW = re.compile(r'^(.*\bVALUES\s*)(\([^()]*\))(.*)$', re.IGNORECASE | re.DOTALL)
 
 def execute_transaction(queries: List[tuple]) -> int:
     """
     Execute multiple queries in a transaction
 
+    Runs of the same single-row INSERT ... VALUES statement are sent as one
+    multi-row INSERT; other statements run one by one.
+
     Args:
         queries: List of (query, params) tuples
 
     Returns:
         Number of affected rows
     """
-    conn = None
-    try:
-        conn = get_db_connection()
-        conn.autocommit = False
-
+    # Pooled connections are not in autocommit mode, so everything below runs
+    # in one transaction that db_conn rolls back on error
+    with db_conn() as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cursor:
             total_rows = 0
-            for query, params in queries:
-                cursor.execute(query, params)
-                total_rows += cursor.rowcount
+            for query, group in groupby(queries, key=lambda q: q[0]):
+                param_list = [params for _, params in group]
+                values = _VALUES_ROW.match(query) if len(param_list) > 1 else None
+
+                # ON CONFLICT DO UPDATE can't touch the same row twice in one
+                # statement, so those keep running row by row
+                if values and 'DO UPDATE' not in values.group(3).upper():
+                    # Consecutive single-row INSERTs become one multi-row INSERT
+                    head, template, tail = values.groups()
+                    execute_values(cursor, f'{head}%s{tail}', param_list, template=template, page_size=len(param_list))
+                    total_rows += cursor.rowcount
+                else:
+                    for params in param_list:
+                        cursor.execute(query, params)
+                        total_rows += cursor.rowcount
 
             conn.commit()
             return total_rows
 
-    except Exception as e:
-        if conn:
-            conn.rollback()
-        raise e
+def execute_copy(staging_sql: str, table: str, columns: Sequence[str], rows: Iterable[tuple], query: str, params: tuple = None) -> List[Dict[str, Any]]:
+    """
+    Bulk load rows with COPY, then run a query over them in one transaction
+
+    Typical use is COPY into a temporary staging table created by
+    staging_sql, followed by an INSERT ... SELECT from it into the real
+    tables.
+
+    Args:
+        staging_sql: Statement run before the COPY (e.g. CREATE TEMP TABLE)
+        table: Table to COPY into
+        columns: Column names, in the order of each row tuple
+        rows: Row tuples; None becomes NULL, lists become arrays
+        query: Statement run after the COPY
+        params: Parameters for query
+
+    Returns:
+        Rows returned by query as list of dicts
+    """
+    with db_conn() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(staging_sql)
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                _copy_csv(rows)
+            )
+            cursor.execute(query, params)
+            results = cursor.fetchall() if cursor.description else []
+            conn.commit()
+            return results
+
+def _copy_csv(rows: Iterable[tuple]) -> io.StringIO:
+    """Render rows as COPY csv input (NULL written as \\N)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(value) for value in row])
+    buffer.seek(0)
+    return buffer
+
+def _copy_value(value: Any) -> Any:
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (list, tuple)):
+        items = ('NULL' if item is None else '"' + str(item).replace('\\', '\\\\').replace('"', '\\"') + '"' for item in value)
+        return '{' + ','.join(items) + '}'
+    return value
+
+@contextmanager
+def advisory_lock(key: str, wait: bool = True):
+    """
+    Hold a session-level Postgres advisory lock for the duration of the block
+
+    By default blocks until the lock is available, so work guarded by the
+    same key is serialized across requests and worker processes. With
+    wait=False the lock is only tried (pg_try_advisory_lock) and the block
+    runs either way; it receives whether the lock was acquired.
+
+    Args:
+        key: Lock name, hashed to a lock id with hashtext()
+        wait: Block until the lock is free instead of giving up at once
+
+    The lock lives on a dedicated connection opened outside the pool (and
+    its DB_POOL_MAX slots), so a block that itself runs pooled queries, or
+    holds the lock for a long call, never starves the pool it depends on.
+    Closing that connection also releases the lock if unlocking fails.
+
+    Yields:
+        True if the lock is held, False if wait=False and it was taken
+    """
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        with conn.cursor() as cursor:
+            if wait:
+                # Waiting for the lock may outlast statement_timeout
+                cursor.execute('SET LOCAL statement_timeout = 0')
+                cursor.execute('SELECT pg_advisory_lock(hashtext(%s))', (key,))
+                acquired = True
+            else:
+                cursor.execute('SELECT pg_try_advisory_lock(hashtext(%s))', (key,))
+                acquired = cursor.fetchone()[0]
+        conn.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                with conn.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_unlock(hashtext(%s))', (key,))
+                conn.commit()
     finally:
-        if conn:
-            conn.autocommit = True
-            return_db_connection(conn)
+        conn.close()
+
+def warm_pool():
+    """
+    Open the pool's minimum connections and touch the users table on each
+
+    Run at startup so the first requests find connected sessions and the
+    hot users pages already in Postgres's shared buffers.
+    """
+    with ExitStack() as stack:
+        for _ in range(DB_POOL_MIN):
+            conn = stack.enter_context(db_conn())
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1 FROM users LIMIT 1')
+            conn.commit()
 
 def close_pool():
     """Close all connections in the pool"""
@@ -1,16 +1,21 @@
 import asyncio
-import base64
-import json
+import atexit
 import os
+import queue
 import warnings
+import weakref
 import logging
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import AsyncIterable, Dict, Set
+from typing import AsyncIterable, Set
 from datetime import datetime
+from functools import lru_cache
+
+import orjson
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, Query, WebSocket, UploadFile, File, HTTPException
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi import FastAPI, Query, WebSocket, WebSocketDisconnect, UploadFile, File, HTTPException
+from fastapi.responses import FileResponse, HTMLResponse, ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from google.adk.agents import LiveRequestQueue
 from google.adk.agents.run_config import RunConfig
@@ -18,7 +23,9 @@ from google.adk.events.event import Event
 from google.adk.runners import Runner
 from google.adk.sessions.in_memory_session_service import InMemorySessionService
 from google.genai import types
-from midwaife.agent import root_agent
+from midwaife.agent import get_root_agent
+from midwaife.runner import ensure_session_initialized
+from db.pg_database import warm_pool
 from meals.routes import router as meals_router
 from users.routes import router as users_router
 from midwaife.routes import router as agent_router
@@ -33,8 +40,9 @@ PORT = int(os.getenv('PORT', 8000))
 # WebSocket Log Forwarding
 #
 
-# Store active WebSocket connections for log forwarding
-websocket_connections: Dict[str, WebSocket] = {}
+# Store active WebSocket connections for log forwarding. Weak values let a
+# closed socket be collected even if its cleanup never runs.
+websocket_connections: weakref.WeakValueDictionary[str, WebSocket] = weakref.WeakValueDictionary()
 
 # Module-level variable to store the current WebSocket for log forwarding
 _current_websocket: WebSocket = None
@@ -44,27 +52,84 @@ _current_websocket: WebSocket = None
 # Load Gemini API Key
 load_dotenv()
 
+# WebSocket handlers and the agent runner log per message at DEBUG; keep
+# production at WARNING. Records go through a queue and are written to stderr
+# by a listener thread, so logging never blocks the event loop on I/O.
+_log_queue = queue.SimpleQueue()
+_log_stream = logging.StreamHandler()
+_log_stream.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+_log_listener = QueueListener(_log_queue, _log_stream)
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "WARNING").upper(),
+    handlers=[QueueHandler(_log_queue)]
+)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+logger = logging.getLogger(__name__)
+
 APP_NAME = "ADK Streaming example"
 session_service = InMemorySessionService()
 
-
-async def start_agent_session(session_id, is_audio=False, websocket=None):
-    """Starts an agent session"""
-
-    # Create a Session
-    session = await session_service.create_session(
+# One Runner serves every websocket session; built on the first connection
+@lru_cache(maxsize=1)
+def _get_runner() -> Runner:
+    return Runner(
         app_name=APP_NAME,
-        user_id=session_id,
-        session_id=session_id,
-    )
-
-    # Create a Runner
-    runner = Runner(
-        app_name=APP_NAME,
-        agent=root_agent,
+        agent=get_root_agent(),
         session_service=session_service,
     )
 
+# Audio travels as binary websocket frames: one tag byte followed by raw PCM.
+# Clients may also send images as binary frames: the tag byte, the mime type,
+# a NUL separator and the raw image bytes. Everything else stays a JSON text
+# frame.
+AUDIO_FRAME_TAG = 0x01
+AUDIO_FRAME_PREFIX = bytes([AUDIO_FRAME_TAG])
+# Largest PCM payload per outgoing audio frame (even, so 16-bit samples are
+# never split across frames)
+AUDIO_FRAME_MAX_BYTES = 16 * 1024
+IMAGE_FRAME_TAG = 0x02
+
+# Streamed text tokens are coalesced until either limit is reached
+TEXT_FLUSH_CHARS = 64
+TEXT_FLUSH_SECONDS = 0.02
+
+# Pre-encoded turn boundary frames keyed by (turn_complete, interrupted)
+_TURN_FRAMES = {
+    (turn_complete, interrupted): orjson.dumps(
+        {"turn_complete": turn_complete, "interrupted": interrupted}
+    ).decode()
+    for turn_complete in (True, False)
+    for interrupted in (True, False)
+}
+
+
+def _error_frame(text: str) -> str:
+    return orjson.dumps({
+        "mime_type": "text/plain",
+        "data": text,
+        "role": "model",
+        "turn_complete": True,
+        "error": True,
+    }).decode()
+
+
+# Pre-encoded error frames for a failed agent stream and a failed session
+_AGENT_ERROR_FRAME = _error_frame(
+    "I apologize, but there was an error processing your request. Please try again."
+)
+_ERROR_FRAME = _error_frame("I apologize, but there was an unexpected error. Please try again.")
+
+
+# RunConfig per response modality, built on first use and shared by sessions
+_RUN_CONFIGS: dict[bool, RunConfig] = {}
+
+
+def _run_config(is_audio: bool) -> RunConfig:
+    run_config = _RUN_CONFIGS.get(is_audio)
+    if run_config is not None:
+        return run_config
+
     # Set response modality
     modality = "AUDIO" if is_audio else "TEXT"
 
@@ -83,40 +148,90 @@ async def start_agent_session(session_id, is_audio=False, websocket=None):
     if is_audio:
         config["output_audio_transcription"] = {}
 
-    run_config = RunConfig(**config)
+    run_config = _RUN_CONFIGS[is_audio] = RunConfig(**config)
+    return run_config
+
+
+async def start_agent_session(session_id, is_audio=False, websocket=None):
+    """Starts an agent session"""
+
+    # Create a Session
+    session = await session_service.create_session(
+        app_name=APP_NAME,
+        user_id=session_id,
+        session_id=session_id,
+    )
+
+    run_config = _run_config(is_audio)
 
     # Create a LiveRequestQueue for this session
     live_request_queue = LiveRequestQueue()
 
     try:
         # Start agent session - don't await since it returns an async generator
-        live_events = runner.run_live(
+        live_events = _get_runner().run_live(
             session=session,
             live_request_queue=live_request_queue,
             run_config=run_config,
         )
         return live_events, live_request_queue
     except Exception as e:
-        print(f"Error starting agent session: {e}")
+        logger.error("Error starting agent session: %s", e)
         raise
 
 
 async def agent_to_client_messaging(
     websocket: WebSocket, live_events: AsyncIterable[Event | None]
 ):
-    """Agent to client communication"""
+    """Agent to client communication
+
+    Partial text tokens are buffered and sent as one frame once the buffer
+    passes TEXT_FLUSH_CHARS, TEXT_FLUSH_SECONDS have elapsed, or the turn
+    ends, instead of one frame per token.
+    """
+    loop = asyncio.get_running_loop()
+    send_lock = asyncio.Lock()
+    text_buffer: list[str] = []
+    buffered_chars = 0
+    last_flush = loop.time()
+    flush_timer: asyncio.TimerHandle | None = None
+    flush_task: asyncio.Future | None = None
+
+    async def flush_text():
+        nonlocal buffered_chars, last_flush, flush_timer
+        async with send_lock:
+            if flush_timer is not None:
+                flush_timer.cancel()
+                flush_timer = None
+            last_flush = loop.time()
+            if not text_buffer:
+                return
+            text_content = "".join(text_buffer)
+            text_buffer.clear()
+            buffered_chars = 0
+            if text_content.strip():
+                message = {
+                    "mime_type": "text/plain",
+                    "data": text_content,
+                    "role": "model",
+                }
+                await websocket.send_text(orjson.dumps(message).decode())
+
+    def start_timed_flush():
+        # Keep a reference so the flush can be awaited before the stream ends
+        nonlocal flush_task
+        flush_task = asyncio.ensure_future(flush_text())
+
     try:
         async for event in live_events:
             if event is None:
                 continue
 
-            # If the turn complete or interrupted, send it
+            # If the turn complete or interrupted, flush pending text and send it
             if event.turn_complete or event.interrupted:
-                message = {
-                    "turn_complete": event.turn_complete,
-                    "interrupted": event.interrupted,
-                }
-                await websocket.send_text(json.dumps(message))
+                await flush_text()
+                message = _TURN_FRAMES[(bool(event.turn_complete), bool(event.interrupted))]
+                await websocket.send_text(message)
                 #print(f"[AGENT TO CLIENT]: {message}")
                 continue
 
@@ -125,26 +240,21 @@ async def agent_to_client_messaging(
             if not part:
                 continue
 
-            # Make sure we have a valid Part
-            if not isinstance(part, types.Part):
-                continue
-
             # Only send text if it's a partial response (streaming)
             # Skip the final complete message to avoid duplication
             if part.text and event.partial:
-                text_content = part.text.strip()
-                
-                # Only skip obvious system warnings, not agent responses
-                if text_content and len(text_content) > 3:
-                    message = {
-                        "mime_type": "text/plain",
-                        "data": text_content,
-                        "role": "model",
-                    }
-                    await websocket.send_text(json.dumps(message))
-                    #print(f"[AGENT TO CLIENT]: text/plain: {text_content}")
-
-            # If it's audio, send Base64 encoded audio data
+                text_buffer.append(part.text)
+                buffered_chars += len(part.text)
+                if (
+                    buffered_chars > TEXT_FLUSH_CHARS
+                    or loop.time() - last_flush > TEXT_FLUSH_SECONDS
+                ):
+                    await flush_text()
+                elif flush_timer is None:
+                    # Bound the latency of a token that arrives alone
+                    flush_timer = loop.call_later(TEXT_FLUSH_SECONDS, start_timed_flush)
+
+            # If it's audio, send the raw PCM as a tagged binary frame
             is_audio = (
                 part.inline_data
                 and part.inline_data.mime_type
@@ -153,28 +263,36 @@ async def agent_to_client_messaging(
             if is_audio:
                 audio_data = part.inline_data and part.inline_data.data
                 if audio_data:
-                    message = {
-                        "mime_type": "audio/pcm",
-                        "data": base64.b64encode(audio_data).decode("ascii"),
-                        "role": "model",
-                    }
-                    await websocket.send_text(json.dumps(message))
+                    # PCM is a plain sample stream, so large parts are split
+                    # into several ordinary audio frames, yielding between
+                    # them so other sessions are not held up by one big write
+                    for start in range(0, len(audio_data), AUDIO_FRAME_MAX_BYTES):
+                        if start:
+                            await asyncio.sleep(0)
+                        await websocket.send_bytes(
+                            AUDIO_FRAME_PREFIX
+                            + audio_data[start:start + AUDIO_FRAME_MAX_BYTES]
+                        )
                     #print(f"[AGENT TO CLIENT]: audio/pcm: {len(audio_data)} bytes.")
     except Exception as e:
-        print(f"Error in agent_to_client_messaging: {e}")
+        logger.error("Error in agent_to_client_messaging: %s", e)
         # Send error message to client instead of raising
         try:
-            error_message = {
-                "mime_type": "text/plain",
-                "data": f"I apologize, but there was an error processing your request. Please try again.",
-                "role": "model",
-                "turn_complete": True,
-                "error": True
-            }
-            await websocket.send_text(json.dumps(error_message))
+            await websocket.send_text(_AGENT_ERROR_FRAME)
         except Exception as send_error:
-            print(f"Error sending error message to client: {send_error}")
+            logger.warning("Error sending error message to client: %s", send_error)
         raise
+    finally:
+        if flush_timer is not None:
+            flush_timer.cancel()
+        # Let a timed flush finish, then send whatever the stream left
+        # buffered without a turn_complete; the socket may already be closed
+        try:
+            if flush_task is not None:
+                await flush_task
+            await flush_text()
+        except Exception as e:
+            logger.debug("Could not flush buffered text: %s", e)
 
 
 async def client_to_agent_messaging(
@@ -182,48 +300,54 @@ async def client_to_agent_messaging(
 ):
     """Client to agent communication"""
     while True:
-        # Decode JSON message
-        message_json = await websocket.receive_text()
-        message = json.loads(message_json)
+        frame = await websocket.receive()
+        if frame["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(frame.get("code", 1000))
+
+        # Binary frames carry raw media behind a one-byte tag, so large
+        # payloads never go through JSON or base64 decoding
+        payload = frame.get("bytes")
+        if payload is not None:
+            tag = payload[0] if payload else None
+            if tag == AUDIO_FRAME_TAG:
+                # ActivityStart/End and transcription handling is done
+                # automatically by the ADK when input_audio_transcription is
+                # enabled in the config
+                mime_type, data = "audio/pcm", payload[1:]
+            elif tag == IMAGE_FRAME_TAG:
+                mime_type, _, data = payload[1:].partition(b"\0")
+                mime_type = mime_type.decode("ascii")
+                if not mime_type.startswith("image/"):
+                    raise ValueError(f"Mime type not supported: {mime_type}")
+            else:
+                raise ValueError("Unsupported binary frame")
+            live_request_queue.send_realtime(types.Blob(data=data, mime_type=mime_type))
+            logger.debug("[FRONTEND TO AGENT]: %s: %d bytes", mime_type, len(data))
+            continue
+
+        # Text frames carry JSON chat messages only
+        message = orjson.loads(frame["text"])
         mime_type = message["mime_type"]
+        if mime_type != "text/plain":
+            raise ValueError(f"Mime type not supported in text frames: {mime_type}")
         data = message["data"]
         role = message.get("role", "user")  # Default to 'user' if role is not provided
 
-        # Send the message to the agent
-        if mime_type == "text/plain":
-            # Send a text message
-            content = types.Content(role=role, parts=[types.Part.from_text(text=data)])
-            live_request_queue.send_content(content=content)
-            print(f"[FRONTEND TO AGENT]: {data}")
-        elif mime_type == "audio/pcm":
-            # Send audio data
-            decoded_data = base64.b64decode(data)
-
-            # Send the audio data - note that ActivityStart/End and transcription
-            # handling is done automatically by the ADK when input_audio_transcription
-            # is enabled in the config
-            live_request_queue.send_realtime(
-                types.Blob(data=decoded_data, mime_type=mime_type)
-            )
-            print(f"[FRONTEND TO AGENT]: audio/pcm: {len(decoded_data)} bytes")
-        elif mime_type.startswith("image/"):
-            # Send image data as binary
-            decoded_data = base64.b64decode(data)
-            
-            # Send the image data as a blob
-            live_request_queue.send_realtime(
-                types.Blob(data=decoded_data, mime_type=mime_type)
-            )
-            print(f"[FRONTEND TO AGENT]: {mime_type}: {len(decoded_data)} bytes")
-        else:
-            raise ValueError(f"Mime type not supported: {mime_type}")
+        # Send a text message; the fields are plain local strings, so skip
+        # pydantic validation
+        content = types.Content.model_construct(
+            role=role, parts=[types.Part.model_construct(text=data)]
+        )
+        live_request_queue.send_content(content=content)
+        logger.debug("[FRONTEND TO AGENT]: %s", data)
 
 
 #
 # FastAPI web app
 #
 
-app = FastAPI()
+# JSON bodies are rendered with orjson rather than the stdlib json module
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Include routers
 app.include_router(meals_router)
@@ -231,12 +355,15 @@ app.include_router(users_router)
 app.include_router(agent_router)
 app.include_router(daily_logs_router)
 # Allow CORS for frontend dev server and production
+# Production frontend URL comes from the environment; skip it when unset
+CORS_ORIGINS = [
+    origin
+    for origin in ("http://localhost:3000", os.getenv("FRONTEND_URL", ""))
+    if origin
+]
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",
-        os.getenv("FRONTEND_URL", ""),  # Production frontend URL from environment variable
-    ],
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -263,15 +390,24 @@ async def websocket_endpoint(
     session_id: str,
     is_audio: str = Query(...),
 ):
-    """Client websocket endpoint"""
-    print(f"New WebSocket connection request for session {session_id}")
+    """Client websocket endpoint
+
+    Text frames are JSON: chat messages from the client
+    ({"mime_type": "text/plain", "data": ..., "role": ...}), and streamed
+    text, turn boundaries and errors from the agent. Media never goes
+    through JSON: audio is a binary frame of AUDIO_FRAME_TAG + raw PCM in
+    both directions, and client images are IMAGE_FRAME_TAG + mime type +
+    NUL + raw bytes. The tag byte is all the metadata a media frame needs.
+    """
+    logger.debug("New WebSocket connection request for session %s", session_id)
     
     # Wait for client connection
     await websocket.accept()
     websocket_connections[session_id] = websocket
     
-    print(f"Client #{session_id} connected, audio mode: {is_audio}")
-    print(f"Active WebSocket connections: {list(websocket_connections.keys())}")
+    logger.info("Client #%s connected, audio mode: %s", session_id, is_audio)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Active WebSocket connections: %s", list(websocket_connections))
 
     try:
         # Start agent session
@@ -290,33 +426,69 @@ async def websocket_endpoint(
             client_to_agent_messaging(websocket, live_request_queue)
         )
         
-        # Wait for both tasks to complete
-        await asyncio.gather(agent_to_client_task, client_to_agent_task)
+        # Whichever side finishes first ends the session; cancel the other
+        done, pending = await asyncio.wait(
+            {agent_to_client_task, client_to_agent_task},
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            task.result()
     except Exception as e:
-        print(f"WebSocket error for session {session_id}: {e}")
+        logger.error("WebSocket error for session %s: %s", session_id, e)
         # Send a user-friendly error message before closing the connection
         try:
-            error_message = {
-                "mime_type": "text/plain",
-                "data": f"I apologize, but there was an unexpected error. Please try again.",
-                "role": "model",
-                "turn_complete": True,
-                "error": True
-            }
-            await websocket.send_text(json.dumps(error_message))
+            await websocket.send_text(_ERROR_FRAME)
         except Exception as send_error:
-            print(f"Error sending error message to client: {send_error}")
+            logger.warning("Error sending error message to client: %s", send_error)
         raise  # Re-raise the exception to ensure proper error handling
     finally:
         # Remove the connection when it's closed
-        if session_id in websocket_connections:
-            del websocket_connections[session_id]
-            print(f"WebSocket connection removed for session {session_id}")
-            print(f"Remaining WebSocket connections: {list(websocket_connections.keys())}")
-        
-            
-        print(f"Client #{session_id} disconnected")
+        if websocket_connections.pop(session_id, None) is not None:
+            logger.debug("WebSocket connection removed for session %s", session_id)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Remaining WebSocket connections: %s", list(websocket_connections))
+
+        logger.info("Client #%s disconnected", session_id)
+
+# Favicon bytes, read once at startup; None when the frontend is not deployed
+# alongside the API
+FAVICON_BYTES: bytes | None = None
+
+
+@app.on_event("startup")
+def load_favicon():
+    global FAVICON_BYTES
+    try:
+        FAVICON_BYTES = (PUBLIC_DIR / "favicon.ico").read_bytes()
+    except OSError:
+        FAVICON_BYTES = None
+
+
+@app.on_event("startup")
+async def init_agent_session():
+    # Create the shared ADK session before the first chat request needs it
+    await ensure_session_initialized()
+
+
+@app.on_event("startup")
+async def warm_db_pool():
+    # Connect the pool's minimum connections up front; a database that is
+    # down at boot should not keep the app from starting
+    try:
+        await asyncio.to_thread(warm_pool)
+    except Exception as e:
+        logger.warning("Could not warm database pool: %s", e)
+
 
 @app.get("/favicon.ico")
 async def favicon():
-    return FileResponse(PUBLIC_DIR / "favicon.ico")
\ No newline at end of file
+    if FAVICON_BYTES is None:
+        raise HTTPException(status_code=404, detail="Favicon not found")
+    return Response(
+        content=FAVICON_BYTES,
+        media_type="image/vnd.microsoft.icon",
+        headers={"Cache-Control": "public, max-age=86400"},
+    )
\ No newline at end of file
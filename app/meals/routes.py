@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Response
 from typing import List, Optional
 from meals.service import MealService
 from meals.models import (
@@ -13,6 +14,25 @@ from meals.models import (
 router = APIRouter(prefix="/api/meals", tags=["meals"])
 meal_service = MealService()
 
+# Bound once so handlers skip the attribute lookup on every request
+_search_foods = meal_service.search_foods
+_get_all_foods = meal_service.get_all_foods
+_get_food_by_id = meal_service.get_food_by_id
+_create_food = meal_service.create_food
+_get_week_meals = meal_service.get_week_meals
+_get_meals_by_date_range = meal_service.get_meals_by_date_range
+_upsert_meal = meal_service.upsert_meal
+_add_meal_item = meal_service.add_meal_item
+_remove_meal_item = meal_service.remove_meal_item
+_delete_meal = meal_service.delete_meal
+_get_milestone_by_week = meal_service.get_milestone_by_week
+_get_all_milestones = meal_service.get_all_milestones
+
+# Day lists arrive from Postgres as ready-made JSON text and are sent as is.
+# response_model is kept on the routes for the OpenAPI schema.
+def _day_list_response(days_json: str) -> Response:
+    return Response(content=days_json, media_type="application/json")
+
 # ============================================================================
 # FOOD ITEMS ENDPOINTS
 # ============================================================================
@@ -22,9 +42,9 @@ async def get_foods(q: Optional[str] = Query(None, description="Search query")):
     """Get all foods or search by query"""
     try:
         if q:
-            foods = meal_service.search_foods(q)
+            foods = await asyncio.to_thread(_search_foods, q)
         else:
-            foods = meal_service.get_all_foods()
+            foods = await asyncio.to_thread(_get_all_foods)
         return foods
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching foods: {str(e)}")
@@ -33,7 +53,7 @@ async def get_foods(q: Optional[str] = Query(None, description="Search query")):
 async def get_food_by_id(food_id: str):
     """Get a single food item by ID"""
     try:
-        food = meal_service.get_food_by_id(food_id)
+        food = await asyncio.to_thread(_get_food_by_id, food_id)
         if not food:
             raise HTTPException(status_code=404, detail="Food not found")
         return food
@@ -46,7 +66,7 @@ async def get_food_by_id(food_id: str):
 async def create_food(food: FoodItemCreate):
     """Create a new food item (admin only)"""
     try:
-        new_food = meal_service.create_food(food)
+        new_food = await asyncio.to_thread(_create_food, food)
         return new_food
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating food: {str(e)}")
@@ -62,8 +82,8 @@ async def get_week_meals(
 ):
     """Get all meals for a week"""
     try:
-        days = meal_service.get_week_meals(user_id, start_date)
-        return days
+        days = await asyncio.to_thread(_get_week_meals, user_id, start_date)
+        return _day_list_response(days)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching week meals: {str(e)}")
 
@@ -75,8 +95,8 @@ async def get_meals_by_date_range(
 ):
     """Get all meals for a date range"""
     try:
-        days = meal_service.get_meals_by_date_range(user_id, start_date, end_date)
-        return days
+        days = await asyncio.to_thread(_get_meals_by_date_range, user_id, start_date, end_date)
+        return _day_list_response(days)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching meals: {str(e)}")
 
@@ -84,7 +104,8 @@ async def get_meals_by_date_range(
 async def upsert_meal(meal_data: MealUpsert):
     """Create or update a meal with food items"""
     try:
-        meal_service.upsert_meal(
+        await asyncio.to_thread(
+            _upsert_meal,
             meal_data.userId,
             meal_data.date,
             meal_data.dayOfWeek,
@@ -100,7 +121,8 @@ async def add_meal_item(item_data: MealItemAdd):
     """Add a single food item to a meal"""
     try:
         print(f"[DEBUG] Received add-item request: userId={item_data.userId}, date={item_data.date}, dayOfWeek={item_data.dayOfWeek}, mealType={item_data.mealType}, foodItemId={item_data.foodItemId}")
-        meal_service.add_meal_item(
+        await asyncio.to_thread(
+            _add_meal_item,
             item_data.userId,
             item_data.date,
             item_data.dayOfWeek,
@@ -119,7 +141,7 @@ async def remove_meal_item(
 ):
     """Remove a food item from a meal"""
     try:
-        meal_service.remove_meal_item(meal_id, food_item_id)
+        await asyncio.to_thread(_remove_meal_item, meal_id, food_item_id)
         return {"message": "Food item removed successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error removing food item: {str(e)}")
@@ -128,7 +150,7 @@ async def remove_meal_item(
 async def delete_meal(meal_id: str):
     """Delete an entire meal"""
     try:
-        meal_service.delete_meal(meal_id)
+        await asyncio.to_thread(_delete_meal, meal_id)
         return {"message": "Meal deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting meal: {str(e)}")
@@ -141,7 +163,7 @@ async def delete_meal(meal_id: str):
 async def get_milestone(week_number: int):
     """Get milestone for a specific pregnancy week"""
     try:
-        milestone = meal_service.get_milestone_by_week(week_number)
+        milestone = await asyncio.to_thread(_get_milestone_by_week, week_number)
         if not milestone:
             raise HTTPException(status_code=404, detail="Milestone not found")
         return milestone
@@ -154,7 +176,7 @@ async def get_milestone(week_number: int):
 async def get_all_milestones():
     """Get all milestones"""
     try:
-        milestones = meal_service.get_all_milestones()
+        milestones = await asyncio.to_thread(_get_all_milestones)
         return milestones
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching milestones: {str(e)}")
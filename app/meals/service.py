@@ -1,18 +1,194 @@
 from typing import List, Optional, Dict
 from datetime import datetime, timedelta
-from db.pg_database import execute_query, execute_transaction
+from functools import lru_cache
+from db.pg_database import execute_copy, execute_query, execute_prepared, execute_transaction
+from chat.services import invalidate_today_meals
 from meals.models import (
     FoodItem,
     FoodItemCreate,
-    Meal,
-    DayData,
-    DayMeals,
-    DailySummary,
-    NutrientStatus,
     MicronutrientPresence,
     WeeklyMilestone
 )
 
+# MicronutrientPresence field -> name in the nutrients table
+_NUTRIENT_FIELDS = (
+    ('calcium', 'calcium'),
+    ('iron', 'iron'),
+    ('folicAcid', 'folate'),
+    ('protein', 'protein'),
+    ('vitaminD', 'vitamin_d'),
+    ('omega3', 'dha'),
+    ('fiber', 'fiber'),
+)
+
+# MicronutrientPresence field -> denormalized presence column on foods,
+# e.g. folicAcid -> has_folate (maintained from food_nutrients by a trigger)
+_FLAG_COLUMNS = tuple((attr, f'has_{name}') for attr, name in _NUTRIENT_FIELDS)
+
+# foods columns written by create paths, in FoodItemCreate order followed by
+# the presence flags
+_FOOD_COPY_COLUMNS = (
+    'name', 'portion', 'macro_category', 'rainbow_color', 'phytonutrient_focus',
+    'is_safe_pregnancy', 'warning_message', 'warning_type', 'tags', 'description',
+    *(column for _, column in _FLAG_COLUMNS),
+)
+
+# Get-or-create a meal by its (user_id, log_date, meal_type) key, returning its id
+_UPSERT_MEAL_SQL = '''INSERT INTO meals (user_id, log_date, day_of_week, meal_type)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (user_id, log_date, meal_type)
+    DO UPDATE SET day_of_week = EXCLUDED.day_of_week, updated_at = NOW()
+    RETURNING id'''
+
+# Meals for (user_id, start_date, end_date) as the JSON text of List[DayData].
+# Meal types map to DayMeals keys through meal_type_order; anything else
+# ('snacks', unknown labels) lands on breakfast. meal_docs holds one row per
+# (day, key), merging every meal that maps to the key: items in meal order,
+# id/type/notes from the first meal. day_docs folds those into DayMeals and
+# the DailySummary (a nutrient is 'good' in 2+ meals, 'moderate' in one,
+# 'missing' in none).
+_DAYS_JSON_SQL = '''WITH keyed_meals AS (
+        SELECT
+            meals.*,
+            coalesce(
+                (ARRAY['breakfast', 'snack1', 'lunch', 'snack2', 'dinner'])[meal_type_order],
+                'breakfast'
+            ) AS meal_key,
+            CASE WHEN meal_type_order <= 5 THEN meal_type_order ELSE 1 END AS key_order
+        FROM meals
+        WHERE user_id = %s
+            AND log_date >= %s
+            AND log_date <= %s
+    ),
+    meal_docs AS (
+        SELECT
+            m.log_date,
+            min(m.day_of_week) AS day_of_week,
+            m.key_order,
+            m.meal_key,
+            coalesce(bool_or(f.has_calcium), false) AS has_calcium,
+            coalesce(bool_or(f.has_iron), false) AS has_iron,
+            coalesce(bool_or(f.has_folate), false) AS has_folate,
+            coalesce(bool_or(f.has_protein), false) AS has_protein,
+            coalesce(
+                bool_or(f.is_safe_pregnancy IS NOT TRUE OR coalesce(f.warning_message, '') <> '')
+                    FILTER (WHERE f.id IS NOT NULL),
+                false
+            ) AS has_warnings,
+            json_build_object(
+                'id', (array_agg(m.id ORDER BY m.meal_type_order, m.meal_type))[1],
+                'type', (array_agg(m.meal_type ORDER BY m.meal_type_order, m.meal_type))[1],
+                'items', coalesce(json_agg(json_build_object(
+                    'id', f.id,
+                    'name', f.name,
+                    'portion', f.portion,
+                    'macroCategory', f.macro_category,
+                    'rainbowColor', f.rainbow_color,
+                    'phytonutrientFocus', f.phytonutrient_focus,
+                    'containsMicronutrients', json_build_object(
+                        'calcium', f.has_calcium,
+                        'iron', f.has_iron,
+                        'folicAcid', f.has_folate,
+                        'protein', f.has_protein,
+                        'vitaminD', CASE WHEN f.has_any_flag THEN f.has_vitamin_d END,
+                        'omega3', CASE WHEN f.has_any_flag THEN f.has_dha END,
+                        'fiber', CASE WHEN f.has_any_flag THEN f.has_fiber END
+                    ),
+                    'hasWarnings', f.is_safe_pregnancy IS NOT TRUE OR coalesce(f.warning_message, '') <> '',
+                    'warningMessage', f.warning_message,
+                    'warningType', f.warning_type,
+                    'tags', f.tags,
+                    'description', f.description
+                ) ORDER BY m.meal_type_order, m.meal_type, mi.sort_order) FILTER (WHERE f.id IS NOT NULL), '[]'),
+                'containsMicronutrients', json_build_object(
+                    'calcium', coalesce(bool_or(f.has_calcium), false),
+                    'iron', coalesce(bool_or(f.has_iron), false),
+                    'folicAcid', coalesce(bool_or(f.has_folate), false),
+                    'protein', coalesce(bool_or(f.has_protein), false),
+                    'vitaminD', coalesce(bool_or(f.has_vitamin_d), false),
+                    'omega3', coalesce(bool_or(f.has_dha), false),
+                    'fiber', coalesce(bool_or(f.has_fiber), false)
+                ),
+                'notes', (array_agg(m.notes ORDER BY m.meal_type_order, m.meal_type))[1]
+            ) AS meal
+        FROM keyed_meals m
+        LEFT JOIN meal_items mi ON m.id = mi.meal_id
+        LEFT JOIN (
+            SELECT
+                foods.*,
+                has_calcium OR has_iron OR has_folate OR has_protein
+                    OR has_vitamin_d OR has_dha OR has_fiber AS has_any_flag
+            FROM foods
+        ) f ON mi.food_id = f.id
+        GROUP BY m.log_date, m.meal_key, m.key_order
+    ),
+    nutrient_meals AS (
+        SELECT
+            log_date,
+            min(day_of_week) AS day_of_week,
+            json_object_agg(meal_key, meal) AS meals,
+            coalesce(json_agg(meal_key ORDER BY key_order) FILTER (WHERE has_calcium), '[]') AS calcium_meals,
+            coalesce(json_agg(meal_key ORDER BY key_order) FILTER (WHERE has_iron), '[]') AS iron_meals,
+            coalesce(json_agg(meal_key ORDER BY key_order) FILTER (WHERE has_folate), '[]') AS folate_meals,
+            coalesce(json_agg(meal_key ORDER BY key_order) FILTER (WHERE has_protein), '[]') AS protein_meals,
+            count(*) FILTER (WHERE has_calcium) AS calcium_count,
+            count(*) FILTER (WHERE has_iron) AS iron_count,
+            count(*) FILTER (WHERE has_folate) AS folate_count,
+            count(*) FILTER (WHERE has_protein) AS protein_count,
+            bool_or(has_warnings) AS has_warnings
+        FROM meal_docs
+        GROUP BY log_date
+    ),
+    day_docs AS (
+        SELECT
+            log_date,
+            json_build_object(
+                'id', to_char(log_date, 'YYYY-MM-DD'),
+                'date', to_char(log_date, 'YYYY-MM-DD'),
+                'dayOfWeek', day_of_week,
+                'meals', json_build_object(
+                    'breakfast', meals -> 'breakfast',
+                    'snack1', meals -> 'snack1',
+                    'lunch', meals -> 'lunch',
+                    'snack2', meals -> 'snack2',
+                    'dinner', meals -> 'dinner'
+                ),
+                'dailySummary', json_build_object(
+                    'calcium', json_build_object(
+                        'covered', calcium_count > 0,
+                        'mealsCovered', calcium_meals,
+                        'status', CASE WHEN calcium_count >= 2 THEN 'good' WHEN calcium_count = 1 THEN 'moderate' ELSE 'missing' END
+                    ),
+                    'iron', json_build_object(
+                        'covered', iron_count > 0,
+                        'mealsCovered', iron_meals,
+                        'status', CASE WHEN iron_count >= 2 THEN 'good' WHEN iron_count = 1 THEN 'moderate' ELSE 'missing' END
+                    ),
+                    'folicAcid', json_build_object(
+                        'covered', folate_count > 0,
+                        'mealsCovered', folate_meals,
+                        'status', CASE WHEN folate_count >= 2 THEN 'good' WHEN folate_count = 1 THEN 'moderate' ELSE 'missing' END
+                    ),
+                    'protein', json_build_object(
+                        'covered', protein_count > 0,
+                        'mealsCovered', protein_meals,
+                        'status', CASE WHEN protein_count >= 2 THEN 'good' WHEN protein_count = 1 THEN 'moderate' ELSE 'missing' END
+                    ),
+                    'hasWarnings', has_warnings,
+                    'missingNutrients', to_json(array_remove(ARRAY[
+                        CASE WHEN calcium_count = 0 THEN 'Calcium' END,
+                        CASE WHEN iron_count = 0 THEN 'Iron' END,
+                        CASE WHEN folate_count = 0 THEN 'Folic Acid' END,
+                        CASE WHEN protein_count = 0 THEN 'Protein' END
+                    ], NULL))
+                )
+            ) AS day
+        FROM nutrient_meals
+    )
+    SELECT coalesce(json_agg(day ORDER BY log_date), '[]')::text AS days
+    FROM day_docs'''
+
+
 class MealService:
     """Service layer for meal operations"""
 
@@ -23,43 +199,54 @@ class MealService:
     def get_all_foods(self) -> List[FoodItem]:
         """Get all food items"""
         results = execute_query('SELECT * FROM foods ORDER BY name')
-        # Get nutrients for all foods
-        food_ids = [row['id'] for row in results]
-        nutrients_map = self._get_food_nutrients_map(food_ids)
-        return [self._map_food_item(row, nutrients_map.get(row['id'], [])) for row in results]
+        return [self._map_food_item(row) for row in results]
 
     def search_foods(self, query: str) -> List[FoodItem]:
-        """Search foods by name"""
-        results = execute_query(
+        """Search foods by name (served by the idx_foods_name_trgm trigram index)"""
+        results = execute_prepared(
+            'meals_search_foods',
             'SELECT * FROM foods WHERE name ILIKE %s ORDER BY name LIMIT 20',
             (f'%{query}%',)
         )
-        # Get nutrients for search results
-        food_ids = [row['id'] for row in results]
-        nutrients_map = self._get_food_nutrients_map(food_ids)
-        return [self._map_food_item(row, nutrients_map.get(row['id'], [])) for row in results]
+        return [self._map_food_item(row) for row in results]
 
     def get_food_by_id(self, food_id: str) -> Optional[FoodItem]:
         """Get a single food by ID"""
-        result = execute_query(
+        result = execute_prepared(
+            'meals_food_by_id',
             'SELECT * FROM foods WHERE id = %s',
             (food_id,),
             fetch_one=True
         )
         if not result:
             return None
-        # Get nutrients for this food
-        nutrients_map = self._get_food_nutrients_map([result['id']])
-        return self._map_food_item(result, nutrients_map.get(result['id'], []))
+        return self._map_food_item(result)
 
     def create_food(self, food: FoodItemCreate) -> FoodItem:
-        """Create a new food item"""
-        result = execute_query(
-            '''INSERT INTO foods (
-                name, portion, macro_category, rainbow_color, phytonutrient_focus,
-                is_safe_pregnancy, warning_message, warning_type, tags, description
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING *''',
+        """Create a new food item
+
+        The food row and its nutrient mappings are written by one statement,
+        so they commit together in a single round trip. The presence flags
+        are written up front so RETURNING already carries them.
+        """
+        micronutrients = food.containsMicronutrients
+        result = execute_prepared(
+            'meals_create_food',
+            '''WITH food AS (
+                INSERT INTO foods (
+                    name, portion, macro_category, rainbow_color, phytonutrient_focus,
+                    is_safe_pregnancy, warning_message, warning_type, tags, description,
+                    has_calcium, has_iron, has_folate, has_protein,
+                    has_vitamin_d, has_dha, has_fiber
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING *
+            ), mapped AS (
+                INSERT INTO food_nutrients (food_id, nutrient_id, is_present)
+                SELECT food.id, n.id, true
+                FROM food, nutrients n
+                WHERE n.name = ANY(%s::text[])
+            )
+            SELECT * FROM food''',
             (
                 food.name,
                 food.portion,
@@ -70,156 +257,121 @@ class MealService:
                 food.warningMessage,
                 food.warningType,
                 food.tags,
-                food.description
+                food.description,
+                *(bool(getattr(micronutrients, attr)) for attr, _ in _FLAG_COLUMNS),
+                self._nutrient_names(micronutrients)
             ),
             fetch_one=True
         )
 
-        # Insert nutrient mappings
-        food_id = result['id']
-        self._insert_nutrient_mappings(food_id, food.containsMicronutrients)
-
         return self._map_food_item(result)
 
+    def bulk_create_foods(self, foods: List[FoodItemCreate]) -> int:
+        """Create many food items at once, e.g. when seeding the catalog
+
+        Rows are streamed with COPY into a temporary staging table, then moved
+        into foods and food_nutrients by a single statement in the same
+        transaction.
+
+        Returns:
+            Number of foods created
+        """
+        if not foods:
+            return 0
+
+        rows = [
+            (
+                food.name,
+                food.portion,
+                food.macroCategory,
+                food.rainbowColor,
+                food.phytonutrientFocus,
+                not food.hasWarnings,
+                food.warningMessage,
+                food.warningType,
+                food.tags,
+                food.description,
+                *(bool(getattr(food.containsMicronutrients, attr)) for attr, _ in _FLAG_COLUMNS)
+            )
+            for food in foods
+        ]
+        columns = ', '.join(_FOOD_COPY_COLUMNS)
+
+        result = execute_copy(
+            f'CREATE TEMP TABLE foods_stage ON COMMIT DROP AS SELECT {columns} FROM foods WITH NO DATA',
+            'foods_stage',
+            _FOOD_COPY_COLUMNS,
+            rows,
+            f'''WITH inserted AS (
+                INSERT INTO foods ({columns})
+                SELECT {columns} FROM foods_stage
+                RETURNING *
+            ), mapped AS (
+                INSERT INTO food_nutrients (food_id, nutrient_id, is_present)
+                SELECT i.id, n.id, true
+                FROM inserted i
+                JOIN nutrients n ON (n.name = 'calcium' AND i.has_calcium)
+                    OR (n.name = 'iron' AND i.has_iron)
+                    OR (n.name = 'folate' AND i.has_folate)
+                    OR (n.name = 'protein' AND i.has_protein)
+                    OR (n.name = 'vitamin_d' AND i.has_vitamin_d)
+                    OR (n.name = 'dha' AND i.has_dha)
+                    OR (n.name = 'fiber' AND i.has_fiber)
+            )
+            SELECT count(*) AS created FROM inserted'''
+        )
+        return result[0]['created']
+
     # ========================================================================
     # MEALS
     # ========================================================================
 
-    def get_week_meals(self, user_id: str, start_date: str) -> List[DayData]:
-        """Get meals for a week"""
+    def get_week_meals(self, user_id: str, start_date: str) -> str:
+        """Get meals for a week as a JSON array of DayData"""
         end_date = (datetime.strptime(start_date, '%Y-%m-%d') + timedelta(days=6)).strftime('%Y-%m-%d')
         return self.get_meals_by_date_range(user_id, start_date, end_date)
 
-    def get_meals_by_date_range(self, user_id: str, start_date: str, end_date: str) -> List[DayData]:
-        """Get meals for a date range"""
-        results = execute_query(
-            '''SELECT
-                m.id as meal_id,
-                m.log_date as meal_date,
-                m.day_of_week,
-                m.meal_type,
-                m.notes as meal_notes,
-                mi.id as meal_item_id,
-                mi.sort_order,
-                f.*
-            FROM meals m
-            LEFT JOIN meal_items mi ON m.id = mi.meal_id
-            LEFT JOIN foods f ON mi.food_id = f.id
-            WHERE m.user_id = %s
-                AND m.log_date >= %s
-                AND m.log_date <= %s
-            ORDER BY m.log_date, m.meal_type, mi.sort_order''',
-            (user_id, start_date, end_date)
-        )
-
-        # Get nutrient mappings for all foods
-        food_ids = list(set(row['id'] for row in results if row['id']))
-        nutrients_map = self._get_food_nutrients_map(food_ids)
-
-        # Group by date
-        day_map: Dict[str, DayData] = {}
+    def get_meals_by_date_range(self, user_id: str, start_date: str, end_date: str) -> str:
+        """Get meals for a date range as a JSON array of DayData
 
-        for row in results:
-            date_key = str(row['meal_date'])
-
-            if date_key not in day_map:
-                day_map[date_key] = DayData(
-                    id=date_key,
-                    date=date_key,
-                    dayOfWeek=row['day_of_week'],
-                    meals=DayMeals(),
-                    dailySummary=DailySummary(
-                        calcium=NutrientStatus(covered=False, mealsCovered=[], status='missing'),
-                        iron=NutrientStatus(covered=False, mealsCovered=[], status='missing'),
-                        folicAcid=NutrientStatus(covered=False, mealsCovered=[], status='missing'),
-                        protein=NutrientStatus(covered=False, mealsCovered=[], status='missing'),
-                        hasWarnings=False,
-                        missingNutrients=[]
-                    )
-                )
-
-            day_data = day_map[date_key]
-            meal_type_key = self._map_meal_type_to_key(row['meal_type'])
-
-            # Initialize meal if not exists
-            current_meal = getattr(day_data.meals, meal_type_key)
-            if not current_meal:
-                setattr(day_data.meals, meal_type_key, Meal(
-                    id=row['meal_id'],
-                    type=row['meal_type'],
-                    items=[],
-                    containsMicronutrients=MicronutrientPresence(),
-                    notes=row['meal_notes']
-                ))
-
-            # Add food item if exists
-            if row['id']:
-                food_item = self._map_food_item(row, nutrients_map.get(row['id'], []))
-                current_meal = getattr(day_data.meals, meal_type_key)
-                current_meal.items.append(food_item)
-
-        # Calculate aggregate nutrients
-        for day_data in day_map.values():
-            for meal_attr in ['breakfast', 'snack1', 'lunch', 'snack2', 'dinner']:
-                meal = getattr(day_data.meals, meal_attr)
-                if meal:
-                    meal.containsMicronutrients = self._aggregate_micronutrients(meal.items)
-
-            day_data.dailySummary = self._calculate_daily_summary(day_data.meals)
-
-        return list(day_map.values())
+        Postgres shapes the whole response: items are aggregated per meal,
+        meals and the nutrient summary per day, and the days into one JSON
+        array that is returned as text and sent to the client unchanged.
+        """
+        result = execute_prepared('meals_range', _DAYS_JSON_SQL, (user_id, start_date, end_date), fetch_one=True)
+        return result['days']
 
     def upsert_meal(self, user_id: str, date: str, day_of_week: str, meal_type: str, food_item_ids: List[str]):
-        """Create or update a meal"""
-        queries = []
-
-        # Upsert meal
-        queries.append((
-            '''INSERT INTO meals (user_id, log_date, day_of_week, meal_type)
-               VALUES (%s, %s, %s, %s)
-               ON CONFLICT (user_id, log_date, meal_type)
-               DO UPDATE SET day_of_week = EXCLUDED.day_of_week, updated_at = NOW()
-               RETURNING id''',
+        """Create or update a meal
+
+        Upserts the meal and clears its items in one statement, then inserts
+        all items in one more, inside a single transaction.
+        """
+        queries = [(
+            f'''WITH meal AS ({_UPSERT_MEAL_SQL})
+               DELETE FROM meal_items WHERE meal_id = (SELECT id FROM meal)''',
             (user_id, date, day_of_week, meal_type)
-        ))
+        )]
 
-        # Get meal ID (need to execute first query to get it)
-        meal_result = execute_query(
-            '''INSERT INTO meals (user_id, log_date, day_of_week, meal_type)
-               VALUES (%s, %s, %s, %s)
-               ON CONFLICT (user_id, log_date, meal_type)
-               DO UPDATE SET day_of_week = EXCLUDED.day_of_week, updated_at = NOW()
-               RETURNING id''',
-            (user_id, date, day_of_week, meal_type),
-            fetch_one=True
-        )
-        meal_id = meal_result['id']
+        if food_item_ids:
+            queries.append((
+                '''INSERT INTO meal_items (meal_id, food_id, sort_order)
+                   SELECT m.id, f.food_id, f.ord - 1
+                   FROM meals m,
+                        unnest(%s::uuid[]) WITH ORDINALITY AS f(food_id, ord)
+                   WHERE m.user_id = %s AND m.log_date = %s AND m.meal_type = %s''',
+                (list(food_item_ids), user_id, date, meal_type)
+            ))
 
-        # Delete existing meal items
-        execute_query(
-            'DELETE FROM meal_items WHERE meal_id = %s',
-            (meal_id,),
-            fetch_all=False
-        )
+        execute_transaction(queries)
 
-        # Insert new meal items
-        if food_item_ids:
-            for idx, food_item_id in enumerate(food_item_ids):
-                execute_query(
-                    'INSERT INTO meal_items (meal_id, food_id, sort_order) VALUES (%s, %s, %s)',
-                    (meal_id, food_item_id, idx),
-                    fetch_all=False
-                )
+        invalidate_today_meals(user_id, date)
 
     def add_meal_item(self, user_id: str, date: str, day_of_week: str, meal_type: str, food_item_id: str):
         """Add a food item to a meal"""
         # Get or create meal
         meal_result = execute_query(
-            '''INSERT INTO meals (user_id, log_date, day_of_week, meal_type)
-               VALUES (%s, %s, %s, %s)
-               ON CONFLICT (user_id, log_date, meal_type)
-               DO UPDATE SET day_of_week = EXCLUDED.day_of_week, updated_at = NOW()
-               RETURNING id''',
+            _UPSERT_MEAL_SQL,
             (user_id, date, day_of_week, meal_type),
             fetch_one=True
         )
@@ -240,21 +392,29 @@ class MealService:
             fetch_all=False
         )
 
+        invalidate_today_meals(user_id, date)
+
     def remove_meal_item(self, meal_id: str, food_item_id: str):
         """Remove a food item from a meal"""
-        execute_query(
-            'DELETE FROM meal_items WHERE meal_id = %s AND food_id = %s',
-            (meal_id, food_item_id),
-            fetch_all=False
+        results = execute_query(
+            '''DELETE FROM meal_items mi
+               USING meals m
+               WHERE mi.meal_id = m.id AND mi.meal_id = %s AND mi.food_id = %s
+               RETURNING m.user_id, m.log_date''',
+            (meal_id, food_item_id)
         )
+        for row in results:
+            invalidate_today_meals(str(row['user_id']), row['log_date'])
 
     def delete_meal(self, meal_id: str):
         """Delete a meal"""
-        execute_query(
-            'DELETE FROM meals WHERE id = %s',
+        result = execute_query(
+            'DELETE FROM meals WHERE id = %s RETURNING user_id, log_date',
             (meal_id,),
-            fetch_all=False
+            fetch_one=True
         )
+        if result:
+            invalidate_today_meals(str(result['user_id']), result['log_date'])
 
     # ========================================================================
     # MILESTONES
@@ -262,42 +422,40 @@ class MealService:
 
     def get_milestone_by_week(self, week_number: int) -> Optional[WeeklyMilestone]:
         """Get milestone for a specific week"""
-        result = execute_query(
-            'SELECT * FROM weekly_milestones WHERE week_number = %s',
-            (week_number,),
-            fetch_one=True
-        )
-        return self._map_milestone(result) if result else None
+        return _milestones_by_week().get(week_number)
 
     def get_all_milestones(self) -> List[WeeklyMilestone]:
         """Get all milestones"""
-        results = execute_query('SELECT * FROM weekly_milestones ORDER BY week_number')
-        return [self._map_milestone(row) for row in results]
+        return list(_milestones_by_week().values())
 
     # ========================================================================
     # HELPER METHODS
     # ========================================================================
 
-    def _map_food_item(self, row: Dict, nutrients: List[str] = None) -> FoodItem:
-        """Map database row to FoodItem"""
-        if nutrients is None:
-            nutrients = []
+    def _map_food_item(self, row: Dict) -> FoodItem:
+        """Map database row to FoodItem
+
+        Read-path models are built with model_construct: the values come
+        straight from our own schema, so per-field validation is skipped.
+        """
+        # The optional flags stay None for foods with no nutrient data at all
+        has_any = any(row[column] for _, column in _FLAG_COLUMNS)
 
-        return FoodItem(
+        return FoodItem.model_construct(
             id=row['id'],
             name=row['name'],
             portion=row.get('portion'),
             macroCategory=row.get('macro_category'),
             rainbowColor=row.get('rainbow_color'),
             phytonutrientFocus=row.get('phytonutrient_focus'),
-            containsMicronutrients=MicronutrientPresence(
-                calcium='calcium' in nutrients,
-                iron='iron' in nutrients,
-                folicAcid='folate' in nutrients,
-                protein='protein' in nutrients,
-                vitaminD='vitamin_d' in nutrients if nutrients else None,
-                omega3='dha' in nutrients if nutrients else None,
-                fiber='fiber' in nutrients if nutrients else None
+            containsMicronutrients=MicronutrientPresence.model_construct(
+                calcium=row['has_calcium'],
+                iron=row['has_iron'],
+                folicAcid=row['has_folate'],
+                protein=row['has_protein'],
+                vitaminD=row['has_vitamin_d'] if has_any else None,
+                omega3=row['has_dha'] if has_any else None,
+                fiber=row['has_fiber'] if has_any else None
             ),
             hasWarnings=not row.get('is_safe_pregnancy', True) or bool(row.get('warning_message')),
             warningMessage=row.get('warning_message'),
@@ -306,160 +464,31 @@ class MealService:
             description=row.get('description')
         )
 
-    def _get_food_nutrients_map(self, food_ids: List[str]) -> Dict[str, List[str]]:
-        """Get nutrient mappings for multiple foods"""
-        if not food_ids:
-            return {}
-
-        placeholders = ','.join(['%s'] * len(food_ids))
-        results = execute_query(
-            f'''SELECT fn.food_id, n.name
-                FROM food_nutrients fn
-                JOIN nutrients n ON fn.nutrient_id = n.id
-                WHERE fn.food_id IN ({placeholders}) AND fn.is_present = true''',
-            tuple(food_ids)
-        )
-
-        nutrients_map: Dict[str, List[str]] = {}
-        for row in results:
-            food_id = row['food_id']
-            if food_id not in nutrients_map:
-                nutrients_map[food_id] = []
-            nutrients_map[food_id].append(row['name'])
-
-        return nutrients_map
-
-    def _insert_nutrient_mappings(self, food_id: str, micronutrients: MicronutrientPresence):
-        """Insert nutrient mappings for a food"""
-        nutrients = []
-        if micronutrients.calcium:
-            nutrients.append('calcium')
-        if micronutrients.iron:
-            nutrients.append('iron')
-        if micronutrients.folicAcid:
-            nutrients.append('folate')
-        if micronutrients.protein:
-            nutrients.append('protein')
-        if micronutrients.vitaminD:
-            nutrients.append('vitamin_d')
-        if micronutrients.omega3:
-            nutrients.append('dha')
-        if micronutrients.fiber:
-            nutrients.append('fiber')
-
-        if nutrients:
-            placeholders = ','.join(['%s'] * len(nutrients))
-            execute_query(
-                f'''INSERT INTO food_nutrients (food_id, nutrient_id, is_present)
-                    SELECT %s, id, true FROM nutrients WHERE name IN ({placeholders})''',
-                (food_id, *nutrients),
-                fetch_all=False
-            )
-
-    def _aggregate_micronutrients(self, items: List[FoodItem]) -> MicronutrientPresence:
-        """Aggregate micronutrients from food items"""
-        return MicronutrientPresence(
-            calcium=any(item.containsMicronutrients.calcium for item in items),
-            iron=any(item.containsMicronutrients.iron for item in items),
-            folicAcid=any(item.containsMicronutrients.folicAcid for item in items),
-            protein=any(item.containsMicronutrients.protein for item in items),
-            vitaminD=any(item.containsMicronutrients.vitaminD for item in items if item.containsMicronutrients.vitaminD),
-            omega3=any(item.containsMicronutrients.omega3 for item in items if item.containsMicronutrients.omega3),
-            fiber=any(item.containsMicronutrients.fiber for item in items if item.containsMicronutrients.fiber)
-        )
-
-    def _calculate_daily_summary(self, meals: DayMeals) -> DailySummary:
-        """Calculate daily nutrient summary"""
-        coverage = {
-            'calcium': {'meals': [], 'covered': False},
-            'iron': {'meals': [], 'covered': False},
-            'folicAcid': {'meals': [], 'covered': False},
-            'protein': {'meals': [], 'covered': False}
-        }
-
-        has_warnings = False
-
-        for meal_attr in ['breakfast', 'snack1', 'lunch', 'snack2', 'dinner']:
-            meal = getattr(meals, meal_attr)
-            if meal:
-                if meal.containsMicronutrients.calcium:
-                    coverage['calcium']['meals'].append(meal_attr)
-                    coverage['calcium']['covered'] = True
-                if meal.containsMicronutrients.iron:
-                    coverage['iron']['meals'].append(meal_attr)
-                    coverage['iron']['covered'] = True
-                if meal.containsMicronutrients.folicAcid:
-                    coverage['folicAcid']['meals'].append(meal_attr)
-                    coverage['folicAcid']['covered'] = True
-                if meal.containsMicronutrients.protein:
-                    coverage['protein']['meals'].append(meal_attr)
-                    coverage['protein']['covered'] = True
-
-                if any(item.hasWarnings for item in meal.items):
-                    has_warnings = True
-
-        missing_nutrients = []
-        if not coverage['calcium']['covered']:
-            missing_nutrients.append('Calcium')
-        if not coverage['iron']['covered']:
-            missing_nutrients.append('Iron')
-        if not coverage['folicAcid']['covered']:
-            missing_nutrients.append('Folic Acid')
-        if not coverage['protein']['covered']:
-            missing_nutrients.append('Protein')
-
-        def get_status(covered: bool, meal_count: int) -> str:
-            if not covered:
-                return 'missing'
-            if meal_count >= 2:
-                return 'good'
-            return 'moderate'
-
-        return DailySummary(
-            calcium=NutrientStatus(
-                covered=coverage['calcium']['covered'],
-                mealsCovered=coverage['calcium']['meals'],
-                status=get_status(coverage['calcium']['covered'], len(coverage['calcium']['meals']))
-            ),
-            iron=NutrientStatus(
-                covered=coverage['iron']['covered'],
-                mealsCovered=coverage['iron']['meals'],
-                status=get_status(coverage['iron']['covered'], len(coverage['iron']['meals']))
-            ),
-            folicAcid=NutrientStatus(
-                covered=coverage['folicAcid']['covered'],
-                mealsCovered=coverage['folicAcid']['meals'],
-                status=get_status(coverage['folicAcid']['covered'], len(coverage['folicAcid']['meals']))
-            ),
-            protein=NutrientStatus(
-                covered=coverage['protein']['covered'],
-                mealsCovered=coverage['protein']['meals'],
-                status=get_status(coverage['protein']['covered'], len(coverage['protein']['meals']))
-            ),
-            hasWarnings=has_warnings,
-            missingNutrients=missing_nutrients
-        )
-
-    def _map_meal_type_to_key(self, meal_type: str) -> str:
-        """Map meal type to key"""
-        mapping = {
-            'Breakfast': 'breakfast',
-            'Snack 1': 'snack1',
-            'Lunch': 'lunch',
-            'Snack 2': 'snack2',
-            'Dinner': 'dinner'
-        }
-        return mapping.get(meal_type, 'breakfast')
-
-    def _map_milestone(self, row: Dict) -> WeeklyMilestone:
-        """Map database row to WeeklyMilestone"""
-        return WeeklyMilestone(
-            id=row['id'],
-            weekNumber=row['week_number'],
-            nhsSizeComparison=row.get('nhs_size_comparison'),
-            developmentMilestone=row['development_milestone'],
-            nutritionalFocusColor=row.get('nutritional_focus_color'),
-            keyNutrient=row.get('key_nutrient'),
-            actionTip=row.get('action_tip'),
-            sourceUrl=row.get('source_url')
-        )
+    def _nutrient_names(self, micronutrients: MicronutrientPresence) -> List[str]:
+        """Names in the nutrients table for the flags set on a food"""
+        return [name for attr, name in _NUTRIENT_FIELDS if getattr(micronutrients, attr)]
+
+
+@lru_cache(maxsize=1)
+def _milestones_by_week() -> Dict[int, WeeklyMilestone]:
+    """All weekly milestones keyed by week number, read once per process
+
+    weekly_milestones is static reference data; call
+    _milestones_by_week.cache_clear() after editing it.
+    """
+    results = execute_query('SELECT * FROM weekly_milestones ORDER BY week_number')
+    return {row['week_number']: _map_milestone(row) for row in results}
+
+
+def _map_milestone(row: Dict) -> WeeklyMilestone:
+    """Map database row to WeeklyMilestone"""
+    return WeeklyMilestone(
+        id=row['id'],
+        weekNumber=row['week_number'],
+        nhsSizeComparison=row.get('nhs_size_comparison'),
+        developmentMilestone=row['development_milestone'],
+        nutritionalFocusColor=row.get('nutritional_focus_color'),
+        keyNutrient=row.get('key_nutrient'),
+        actionTip=row.get('action_tip'),
+        sourceUrl=row.get('source_url')
+    )
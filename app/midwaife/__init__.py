@@ -17,5 +17,5 @@ warnings.filterwarnings("ignore")
 os.environ["LITELLM_LOG"] = "ERROR"
 
 # Lazy imports to avoid loading dependencies at package import time
-# Use: from pm_assistant.agent import root_agent
+# Use: from midwaife.agent import get_root_agent
 # Instead of: from pm_assistant import agent
\ No newline at end of file
@@ -1,8 +1,5 @@
-import os
-# Disable bytecode caching during development
-os.environ["PYTHONDONTWRITEBYTECODE"] = "1"
-
 from datetime import datetime, timedelta
+from functools import lru_cache
 from google.adk.agents import LlmAgent
 from google.adk.agents.llm_agent import Agent
 from google.adk.models.lite_llm import LiteLlm
@@ -17,51 +14,67 @@ from midwaife.tools.user_data_tools import create_user_tools
 #os.environ["LITELLM_LOG"] = "ERROR"  # Suppress LiteLLM info logs
 
 from dotenv import load_dotenv
-load_dotenv()
-api_key = os.getenv("ANTHROPIC_API_KEY")
 
-# Create tools
-user_tools = create_user_tools()
 
-root_agent = LlmAgent(
-    model=LiteLlm(
-        model="anthropic/claude-3-5-haiku-20241022"
-    ),
-    name='midwAIfe',
-    description="AI companion for pregnancy support",
-    instruction="""
-    You are midwAIfe, a supportive AI companion for pregnant women.
+@lru_cache(maxsize=1)
+def get_root_agent() -> LlmAgent:
+    """Build the root agent on first use and reuse it afterwards
+
+    Importing this module no longer creates the LLM client and tools; that
+    happens the first time the agent is actually needed.
+    """
+    load_dotenv()
+
+    # Create tools
+    user_tools = create_user_tools()
+
+    return LlmAgent(
+        model=LiteLlm(
+            model="anthropic/claude-3-5-haiku-20241022"
+        ),
+        name='midwAIfe',
+        description="AI companion for pregnancy support",
+        instruction="""
+        You are midwAIfe, a supportive AI companion for pregnant women.
+
+        Your role is to:
+        - Provide personalized nutrition advice based on their current pregnancy week
+        - Help them track and plan healthy meals
+        - Encourage eating a variety of colorful foods (rainbow approach)
+        - Answer questions about pregnancy nutrition and food safety
+        - Be warm, supportive, and non-judgmental
+
+        You have access to tools to:
+        - Get user's current pregnancy week and due date
+        - See what foods they've eaten this week
+        - Check which rainbow colors they're consuming
 
-    Your role is to:
-    - Provide personalized nutrition advice based on their current pregnancy week
-    - Help them track and plan healthy meals
-    - Encourage eating a variety of colorful foods (rainbow approach)
-    - Answer questions about pregnancy nutrition and food safety
-    - Be warm, supportive, and non-judgmental
+        Always:
+        - Use the user's first name when you know it
+        - Reference their current pregnancy week when relevant
+        - Be specific about which foods to eat from missing rainbow color groups
+        - Celebrate their healthy choices
+        - Provide gentle suggestions, not strict rules
 
-    You have access to tools to:
-    - Get user's current pregnancy week and due date
-    - See what foods they've eaten this week
-    - Check which rainbow colors they're consuming
+        When discussing food:
+        - Explain WHY certain nutrients are important
+        - Give practical, specific food suggestions
+        - Consider their dietary restrictions
+        - Use the rainbow color categories: Red, Orange/Yellow, Green, Blue/Purple, White/Brown
 
-    Always:
-    - Use the user's first name when you know it
-    - Reference their current pregnancy week when relevant
-    - Be specific about which foods to eat from missing rainbow color groups
-    - Celebrate their healthy choices
-    - Provide gentle suggestions, not strict rules
+        Remember:
+        - Each week of pregnancy has different nutritional needs
+        - Variety is key - encourage eating the rainbow
+        - Be encouraging and positive
+        - Provide evidence-based advice
+        """,
+        tools=user_tools,
+    )
 
-    When discussing food:
-    - Explain WHY certain nutrients are important
-    - Give practical, specific food suggestions
-    - Consider their dietary restrictions
-    - Use the rainbow color categories: Red, Orange/Yellow, Green, Blue/Purple, White/Brown
 
-    Remember:
-    - Each week of pregnancy has different nutritional needs
-    - Variety is key - encourage eating the rainbow
-    - Be encouraging and positive
-    - Provide evidence-based advice
-    """,
-    tools=user_tools,
-)
+def __getattr__(name):
+    # Keep `from midwaife.agent import root_agent` (and ADK's agent discovery)
+    # working without building the agent at import time
+    if name == "root_agent":
+        return get_root_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,118 +4,43 @@ Midwaife Agent API Routes
 REST API endpoints for interacting with the midwaife agent.
 """
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+import hmac
+import logging
+import os
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Header, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
-from midwaife.agent import root_agent
-from google.adk.runners import Runner
-from google.adk.sessions.in_memory_session_service import InMemorySessionService
-from google.genai import types
+from midwaife.agent import get_root_agent
+from midwaife.runner import (
+    ensure_session_initialized,
+    call_agent_async,
+    stream_agent_async
+)
+from midwaife.tools.user_data_tools import get_user_info_tool, set_current_user_id
 from chat.services import (
-    save_message,
-    get_recent_messages,
-    get_or_create_daily_greeting
+    save_message_async,
+    get_recent_messages_async,
+    encode_message_cursor,
+    get_today_greeting_async,
+    create_daily_greeting,
+    greeting_recently_failed,
+    pregenerate_daily_greetings,
+    FALLBACK_GREETING
 )
 
 router = APIRouter(prefix="/api/agent", tags=["agent"])
+logger = logging.getLogger(__name__)
 
-# Session service for agent
-session_service = InMemorySessionService()
-
-# App configuration
-APP_NAME = "MidwAIfe"
-
-# Runner for the agent
-runner = Runner(
-    agent=root_agent,
-    app_name=APP_NAME,
-    session_service=session_service
-)
-
-# Session initialization flag
-_session_initialized = False
-
-async def ensure_session_initialized():
-    """Ensure default session is initialized"""
-    global _session_initialized
-    if not _session_initialized:
-        try:
-            session = await session_service.create_session(
-                app_name=APP_NAME,
-                user_id="default_user",
-                session_id="default_session"
-            )
-            _session_initialized = True
-            print(f"[OK] Initialized default session for agent")
-            print(f"  App: {APP_NAME}, User: default_user, Session: default_session")
-            return session
-        except Exception as e:
-            print(f"Session initialization error: {e}")
-            # Session might already exist, which is fine
-            _session_initialized = True
-
-
-async def call_agent_async(query: str, user_id: str, session_id: str) -> str:
-    """
-    Sends a query to the agent and returns the final response.
-
-    Args:
-        query: The user's message/question
-        user_id: User identifier
-        session_id: Session identifier for conversation context
-
-    Returns:
-        The agent's text response
-    """
-    print(f"\n{'='*80}")
-    print(f">>> User Query: {query}")
-    print(f"User ID: {user_id}, Session ID: {session_id}")
-    print(f"{'='*80}\n")
-
-    # Verify session exists before running
-    try:
-        existing_session = await session_service.get_session(
-            app_name=APP_NAME,
-            user_id=user_id,
-            session_id=session_id
-        )
-        print(f"[OK] Session verified: {session_id}")
-        print(f"  Session app_name: {existing_session.app_name if hasattr(existing_session, 'app_name') else 'N/A'}")
-        print(f"  Session user_id: {existing_session.user_id if hasattr(existing_session, 'user_id') else 'N/A'}")
-        print(f"  Session id: {existing_session.session_id if hasattr(existing_session, 'session_id') else 'N/A'}")
-    except Exception as e:
-        print(f"[ERROR] Session verification failed: {e}")
-        raise ValueError(f"Session {session_id} not properly initialized")
-
-    # Prepare the user's message in ADK format
-    content = types.Content(role='user', parts=[types.Part(text=query)])
-
-    final_response_text = "I apologize, but I couldn't generate a response. Please try again."
-
-    # Execute the agent and process events
-    async for event in runner.run_async(
-        user_id=user_id,
-        session_id=session_id,
-        new_message=content
-    ):
-        print(f"  [Event] Author: {event.author}, Type: {type(event).__name__}, Final: {event.is_final_response()}")
-
-        # Check if this is the final response
-        if event.is_final_response():
-            if event.content and event.content.parts:
-                # Extract text from the first part
-                final_response_text = event.content.parts[0].text
-            elif event.actions and event.actions.escalate:
-                # Handle escalations/errors
-                final_response_text = f"I encountered an issue: {event.error_message or 'Unknown error'}"
-            break
-
-    print(f"\n{'='*80}")
-    print(f"<<< Agent Response: {final_response_text}")
-    print(f"{'='*80}\n")
-
-    return final_response_text
+# Users whose greeting is being generated by a background task in this process
+_greetings_in_progress = set()
 
+# Shared secret for /internal/* endpoints called by scheduled jobs; they are
+# disabled while it is unset
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
 
 class ChatRequest(BaseModel):
     """Request to chat with the midwaife agent"""
@@ -134,7 +59,7 @@ class ChatResponse(BaseModel):
 
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat_with_agent(request: ChatRequest) -> ChatResponse:
+async def chat_with_agent(request: ChatRequest, background_tasks: BackgroundTasks) -> ChatResponse:
     """
     Chat with the midwaife AI companion.
 
@@ -155,26 +80,28 @@ async def chat_with_agent(request: ChatRequest) -> ChatResponse:
         user_id = request.user_id or "00000000-0000-0000-0000-000000000001"
         session_id = "default_session"
 
-        print(f"Using user: {user_id}, session: {session_id}")
-        print(f"Query: {request.message[:50]}...")
-
-        # Save user message to database
-        save_message(
-            user_id=user_id,
-            session_id=session_id,
-            role='user',
-            content=request.message
-        )
-
-        # Call the agent
-        response_text = await call_agent_async(
-            query=request.message,
-            user_id="default_user",  # ADK session still uses default_user
-            session_id=session_id
+        logger.debug("Chat request (user=%s, session=%s): %.50s", user_id, session_id, request.message)
+
+        # Save the user message while the agent runs; its tools default to
+        # this user
+        set_current_user_id(user_id)
+        _, response_text = await asyncio.gather(
+            save_message_async(
+                user_id=user_id,
+                session_id=session_id,
+                role='user',
+                content=request.message
+            ),
+            call_agent_async(
+                query=request.message,
+                user_id="default_user",  # ADK session still uses default_user
+                session_id=session_id
+            )
         )
 
-        # Save agent response to database
-        save_message(
+        # Save agent response to database after the reply has been sent
+        background_tasks.add_task(
+            save_message_async,
             user_id=user_id,
             session_id=session_id,
             role='model',
@@ -189,12 +116,7 @@ async def chat_with_agent(request: ChatRequest) -> ChatResponse:
         )
 
     except Exception as e:
-        print(f"\n{'='*80}")
-        print(f"ERROR: {str(e)}")
-        print(f"{'='*80}\n")
-
-        import traceback
-        traceback.print_exc()
+        logger.exception("Chat request failed: %s", e)
 
         return ChatResponse(
             success=False,
@@ -205,17 +127,78 @@ async def chat_with_agent(request: ChatRequest) -> ChatResponse:
         )
 
 
+async def _save_streamed_reply(user_id: str, session_id: str, chunks: List[str]):
+    """Background task: store a streamed agent reply once the stream has ended"""
+    if chunks:
+        await save_message_async(
+            user_id=user_id,
+            session_id=session_id,
+            role='model',
+            content=''.join(chunks)
+        )
+
+
+@router.post("/chat/stream")
+async def chat_with_agent_stream(request: ChatRequest):
+    """
+    Chat with the midwaife AI companion, streaming the reply.
+
+    Same as /chat, but the reply is sent as Server-Sent Events while it is
+    generated: one `data: {"text": ...}` event per chunk, then an `end`
+    event (or an `error` event). The full reply is saved after the stream
+    closes.
+    """
+    await ensure_session_initialized()
+
+    user_id = request.user_id or "00000000-0000-0000-0000-000000000001"
+    session_id = "default_session"
+
+    await save_message_async(
+        user_id=user_id,
+        session_id=session_id,
+        role='user',
+        content=request.message
+    )
+
+    chunks: List[str] = []
+
+    async def events():
+        # The agent's tools default to this user
+        set_current_user_id(user_id)
+        try:
+            async for chunk in stream_agent_async(
+                query=request.message,
+                user_id="default_user",  # ADK session still uses default_user
+                session_id=session_id
+            ):
+                chunks.append(chunk)
+                yield b"data: " + orjson.dumps({"text": chunk}) + b"\n\n"
+        except Exception as e:
+            yield b"event: error\ndata: " + orjson.dumps({"error": str(e)}) + b"\n\n"
+            return
+        yield b"event: end\ndata: {}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+        background=BackgroundTask(_save_streamed_reply, user_id, session_id, chunks)
+    )
+
+
 class MessageHistoryResponse(BaseModel):
     """Response containing message history"""
     messages: List[Dict[str, Any]] = Field(..., description="List of messages")
     count: int = Field(..., description="Number of messages returned")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the previous page (pass as `before`)")
 
 
 @router.get("/messages/{user_id}", response_model=MessageHistoryResponse)
 async def get_message_history(
     user_id: str,
     limit: int = 50,
-    since_date: Optional[str] = None
+    since_date: Optional[str] = None,
+    before: Optional[str] = None
 ):
     """
     Get recent message history for a user.
@@ -224,16 +207,30 @@ async def get_message_history(
         user_id: User ID
         limit: Maximum number of messages (default: 50)
         since_date: Optional date filter (YYYY-MM-DD)
+        before: Optional cursor (next_cursor of a previous page) to page back in history
 
     Returns:
         List of messages in chronological order
     """
     try:
-        messages = get_recent_messages(user_id, limit=limit, since_date=since_date)
-        return MessageHistoryResponse(
-            messages=messages,
-            count=len(messages)
+        messages = await get_recent_messages_async(
+            user_id, limit=limit, since_date=since_date, before=before
         )
+
+        # A full page when paging backwards means older messages may exist
+        next_cursor = None
+        if not since_date and messages and len(messages) == limit:
+            next_cursor = encode_message_cursor(messages[0])
+
+        # Message rows are plain dicts; hand them to orjson directly instead
+        # of validating them into MessageHistoryResponse and re-encoding
+        return ORJSONResponse({
+            "messages": messages,
+            "count": len(messages),
+            "next_cursor": next_cursor
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -243,19 +240,42 @@ class GreetingResponse(BaseModel):
     greeting: str = Field(..., description="Greeting message")
     is_new: bool = Field(..., description="Whether this is a newly generated greeting")
     message_id: str = Field(..., description="Message ID")
+    pending: bool = Field(False, description="Placeholder while the greeting is generated; poll again")
+
+
+def _generate_and_save_greeting(user_id: str, session_id: str, user_profile: Dict[str, Any]):
+    """Background task: generate and store today's greeting for a user"""
+    try:
+        # Another worker already generating it will store it; the client
+        # keeps polling until it shows up
+        create_daily_greeting(
+            user_id=user_id,
+            session_id=session_id,
+            user_profile=user_profile,
+            wait=False
+        )
+    except Exception as e:
+        logger.error("Error generating daily greeting for %s: %s", user_id, e)
+    finally:
+        _greetings_in_progress.discard(user_id)
 
 
 @router.get("/greeting/{user_id}", response_model=GreetingResponse)
-async def get_daily_greeting(user_id: str):
+async def get_daily_greeting(user_id: str, background_tasks: BackgroundTasks):
     """
     Get or generate daily greeting for a user.
 
     If a greeting has already been sent today, returns the existing greeting.
-    Otherwise, generates a new personalized greeting based on:
+    Otherwise, returns a short placeholder (pending=True) straight away and
+    generates a personalized greeting in the background, based on:
     - Time of day
     - Current pregnancy week
     - Recent nutrition (rainbow colors)
 
+    Clients poll this endpoint until pending is False. If generation just
+    failed, a generic greeting is returned (not saved, pending=False) so
+    polling stops; generation is retried after a short cooldown.
+
     Args:
         user_id: User ID
 
@@ -264,9 +284,7 @@ async def get_daily_greeting(user_id: str):
     """
     try:
         # Check if greeting already exists
-        from chat.services import get_today_greeting
-
-        existing_greeting = get_today_greeting(user_id)
+        existing_greeting = await get_today_greeting_async(user_id)
 
         if existing_greeting:
             return GreetingResponse(
@@ -275,25 +293,73 @@ async def get_daily_greeting(user_id: str):
                 message_id=existing_greeting['id']
             )
 
-        # Generate new greeting
-        greeting_message = get_or_create_daily_greeting(
-            user_id=user_id,
-            session_id="default_session"
-        )
+        if greeting_recently_failed(user_id):
+            return GreetingResponse(
+                greeting=FALLBACK_GREETING,
+                is_new=False,
+                message_id="fallback"
+            )
+
+        # Keep the LLM call off the request path. The task runs in the
+        # threadpool and create_daily_greeting's advisory lock still guards
+        # against other workers generating the same greeting.
+        user_profile = await asyncio.to_thread(get_user_info_tool, user_id)
+
+        if user_id not in _greetings_in_progress:
+            _greetings_in_progress.add(user_id)
+            background_tasks.add_task(
+                _generate_and_save_greeting,
+                user_id,
+                "default_session",
+                user_profile
+            )
+
+        first_name = user_profile.get('first_name')
+        placeholder = f"Hello {first_name}! Let me catch up on your day..." if first_name else "Hello! Let me catch up on your day..."
 
         return GreetingResponse(
-            greeting=greeting_message['content'],
+            greeting=placeholder,
             is_new=True,
-            message_id=greeting_message['id']
+            message_id="pending",
+            pending=True
         )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _pregenerate_greetings():
+    """Background task: generate today's greetings for active users"""
+    try:
+        generated = pregenerate_daily_greetings()
+        logger.info("Pregenerated %d daily greetings", generated)
+    except Exception as e:
+        logger.error("Error pregenerating daily greetings: %s", e)
+
+
+@router.post("/internal/pregenerate-greetings", status_code=202)
+async def pregenerate_greetings(
+    background_tasks: BackgroundTasks,
+    x_internal_token: Optional[str] = Header(None)
+):
+    """
+    Generate today's greetings for recently active users ahead of time.
+
+    Called by the daily cron job (see render.yaml) so the first greeting
+    request of the day finds a stored greeting. Requires the
+    X-Internal-Token header to match INTERNAL_API_TOKEN.
+    """
+    if not INTERNAL_API_TOKEN or not hmac.compare_digest(x_internal_token or "", INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+    background_tasks.add_task(_pregenerate_greetings)
+    return {"status": "scheduled"}
+
+
 @router.get("/health")
 async def agent_health():
     """Check agent health and configuration"""
+    root_agent = get_root_agent()
     return {
         "status": "healthy",
         "agent_name": root_agent.name,
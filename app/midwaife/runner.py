@@ -0,0 +1,162 @@
+"""
+Midwaife Agent Runner
+
+Shared ADK session service, runner and helpers for calling the agent.
+Kept free of API/chat imports so services can use it without import cycles.
+"""
+
+import asyncio
+import logging
+from functools import lru_cache
+from typing import AsyncIterator
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.runners import Runner
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+from google.genai import types
+from midwaife.agent import get_root_agent
+
+logger = logging.getLogger(__name__)
+
+# Session service for agent
+session_service = InMemorySessionService()
+
+# App configuration
+APP_NAME = "MidwAIfe"
+
+@lru_cache(maxsize=1)
+def get_runner() -> Runner:
+    """Runner for the agent, built together with the agent on first use"""
+    return Runner(
+        agent=get_root_agent(),
+        app_name=APP_NAME,
+        session_service=session_service
+    )
+
+# Ask the model for partial text events so replies can be streamed
+_STREAM_RUN_CONFIG = RunConfig(streaming_mode=StreamingMode.SSE)
+
+# Session initialization flag; set once the default session exists
+_session_initialized = False
+_session_init_lock = asyncio.Lock()
+
+async def ensure_session_initialized():
+    """
+    Ensure default session is initialized
+
+    The API creates it at startup, so later calls return on the flag check.
+    Callers arriving before that wait on the lock instead of each racing
+    through create_session.
+    """
+    global _session_initialized
+    if _session_initialized:
+        return
+    async with _session_init_lock:
+        if _session_initialized:
+            return
+        try:
+            await session_service.create_session(
+                app_name=APP_NAME,
+                user_id="default_user",
+                session_id="default_session"
+            )
+            logger.info("Initialized default agent session (app=%s, user=default_user, session=default_session)", APP_NAME)
+        except Exception as e:
+            logger.warning("Session initialization error: %s", e)
+            # Session might already exist, which is fine
+        _session_initialized = True
+
+
+async def call_agent_async(query: str, user_id: str, session_id: str) -> str:
+    """
+    Sends a query to the agent and returns the final response.
+
+    Args:
+        query: The user's message/question
+        user_id: User identifier
+        session_id: Session identifier for conversation context
+
+    Returns:
+        The agent's text response
+    """
+    logger.debug("User query (user=%s, session=%s): %s", user_id, session_id, query)
+
+    # Verify session exists before running
+    try:
+        await session_service.get_session(
+            app_name=APP_NAME,
+            user_id=user_id,
+            session_id=session_id
+        )
+        logger.debug("Session verified: %s", session_id)
+    except Exception as e:
+        logger.error("Session verification failed: %s", e)
+        raise ValueError(f"Session {session_id} not properly initialized")
+
+    # Prepare the user's message in ADK format
+    content = types.Content(role='user', parts=[types.Part(text=query)])
+
+    final_response_text = "I apologize, but I couldn't generate a response. Please try again."
+
+    # Execute the agent and process events
+    async for event in get_runner().run_async(
+        user_id=user_id,
+        session_id=session_id,
+        new_message=content
+    ):
+        logger.debug("Event author=%s type=%s", event.author, type(event).__name__)
+
+        # Check if this is the final response
+        if event.is_final_response():
+            if event.content and event.content.parts:
+                # Extract text from the first part
+                final_response_text = event.content.parts[0].text
+            elif event.actions and event.actions.escalate:
+                # Handle escalations/errors
+                final_response_text = f"I encountered an issue: {event.error_message or 'Unknown error'}"
+            break
+
+    logger.debug("Agent response: %s", final_response_text)
+
+    return final_response_text
+
+
+async def stream_agent_async(query: str, user_id: str, session_id: str) -> AsyncIterator[str]:
+    """
+    Sends a query to the agent and yields its reply text as it is generated.
+
+    Partial events are yielded as they arrive; the final (aggregated) event
+    is only used when nothing was streamed before it.
+
+    Args:
+        query: The user's message/question
+        user_id: User identifier
+        session_id: Session identifier for conversation context
+
+    Yields:
+        Chunks of the agent's text response
+    """
+    content = types.Content(role='user', parts=[types.Part(text=query)])
+    streamed = False
+
+    async for event in get_runner().run_async(
+        user_id=user_id,
+        session_id=session_id,
+        new_message=content,
+        run_config=_STREAM_RUN_CONFIG
+    ):
+        text = event.content.parts[0].text if event.content and event.content.parts else None
+
+        if event.partial:
+            if text:
+                streamed = True
+                yield text
+            continue
+
+        if event.is_final_response():
+            if not streamed:
+                if text:
+                    yield text
+                elif event.actions and event.actions.escalate:
+                    yield f"I encountered an issue: {event.error_message or 'Unknown error'}"
+            break
@@ -8,9 +8,48 @@ These tools allow the agent to access user information including:
 - Foods consumed during the current week
 """
 
-from datetime import datetime, timedelta
+import asyncio
+import functools
+import threading
+from contextvars import ContextVar
+from datetime import date, datetime, timedelta
 from typing import Optional, Dict, Any, List
-from db.pg_database import execute_query
+from cachetools import TTLCache
+from db.pg_database import execute_prepared
+from daily_logs.service import invalidate_daily_log
+
+# User the agent is currently serving. Set by the chat and greeting paths
+# before running the agent; tools called without an explicit user_id use it.
+DEFAULT_USER_ID = "00000000-0000-0000-0000-000000000001"
+_current_user_id: ContextVar[Optional[str]] = ContextVar("current_user_id", default=None)
+
+
+def set_current_user_id(user_id: str) -> None:
+    """Make user_id the default for tool calls in the current context."""
+    _current_user_id.set(user_id)
+
+
+def _resolve_user_id(user_id: Optional[str]) -> str:
+    """The explicit user_id, else the current context's user, else the default user"""
+    if user_id is not None:
+        return user_id
+    return _current_user_id.get() or DEFAULT_USER_ID
+
+
+# Rainbow color groups foods are tagged with, in display order
+ALL_RAINBOW_COLORS: tuple[str, ...] = ('Red', 'Orange/Yellow', 'Green', 'Blue/Purple', 'White/Brown')
+
+# Raw users rows for get_user_info_tool, keyed by user_id. The agent asks for
+# the profile several times per conversation but it changes rarely; the
+# pregnancy week is derived from due_date on every call, never cached.
+_user_info_cache = TTLCache(maxsize=1024, ttl=300)
+_user_info_lock = threading.Lock()
+
+
+def invalidate_user_info(user_id: str) -> None:
+    """Drop the cached profile row for a user after it changes."""
+    with _user_info_lock:
+        _user_info_cache.pop(str(user_id), None)
 
 
 def calculate_pregnancy_week(due_date: str) -> int:
@@ -26,11 +65,14 @@ def calculate_pregnancy_week(due_date: str) -> int:
     if not due_date:
         return 14  # Default fallback
 
-    due = datetime.fromisoformat(due_date.split('T')[0])
-    today = datetime.now()
+    return _pregnancy_week(due_date.split('T')[0], date.today().toordinal())
 
-    # Calculate days difference
-    diff_days = (due - today).days
+
+@functools.lru_cache(maxsize=4096)
+def _pregnancy_week(due_date: str, today_ordinal: int) -> int:
+    """Pregnancy week for a YYYY-MM-DD due date on a given day (cached per day)"""
+    # Whole days until the due date, as the frontend counts them
+    diff_days = date.fromisoformat(due_date).toordinal() - today_ordinal
 
     # Full term is 280 days (40 weeks)
     days_pregnant = 280 - diff_days
@@ -40,6 +82,13 @@ def calculate_pregnancy_week(due_date: str) -> int:
     return max(1, min(42, weeks_pregnant))
 
 
+def _week_start() -> str:
+    """Start of the current week (Monday) as YYYY-MM-DD"""
+    today = datetime.now()
+    start_of_week = today - timedelta(days=today.weekday())
+    return start_of_week.strftime('%Y-%m-%d')
+
+
 def get_user_info_tool(user_id: Optional[str] = None) -> Dict[str, Any]:
     """
     Get user information including pregnancy details.
@@ -57,14 +106,19 @@ def get_user_info_tool(user_id: Optional[str] = None) -> Dict[str, Any]:
     Returns:
         Dictionary with user information
     """
-    # If no user_id provided, try to get from session context
-    if user_id is None:
-        try:
-            from google.adk.sessions import get_current_session
-            session = get_current_session()
-            user_id = session.state.get("user_id", "00000000-0000-0000-0000-000000000001")
-        except Exception:
-            user_id = "00000000-0000-0000-0000-000000000001"
+    user_id = _resolve_user_id(user_id)
+
+    return _shape_user_info(user_id, _fetch_user_info(user_id))
+
+
+def _fetch_user_info(user_id: str) -> Optional[Dict[str, Any]]:
+    """Read a user's profile row, served from the TTL cache when fresh"""
+    key = str(user_id)
+    with _user_info_lock:
+        result = _user_info_cache.get(key)
+    if result is not None:
+        return result
+
     query = """
         SELECT
             first_name,
@@ -77,8 +131,16 @@ def get_user_info_tool(user_id: Optional[str] = None) -> Dict[str, Any]:
         WHERE id = %s
     """
 
-    result = execute_query(query, (user_id,), fetch_one=True)
+    result = execute_prepared('tools_user_info', query, (user_id,), fetch_one=True)
+    # Unknown users aren't cached so a newly created account shows up at once
+    if result:
+        with _user_info_lock:
+            _user_info_cache[key] = result
+    return result
+
 
+def _shape_user_info(user_id: str, result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build the get_user_info_tool result from a users row"""
     if not result:
         return {
             "error": f"User not found: {user_id}",
@@ -118,43 +180,40 @@ def get_current_week_meals_tool(user_id: Optional[str] = None) -> Dict[str, Any]
     Returns:
         Dictionary with current week's meals
     """
-    # If no user_id provided, try to get from session context
-    if user_id is None:
-        try:
-            from google.adk.sessions import get_current_session
-            session = get_current_session()
-            user_id = session.state.get("user_id", "00000000-0000-0000-0000-000000000001")
-        except Exception:
-            user_id = "00000000-0000-0000-0000-000000000001"
-    # Get the start of the current week (Monday)
-    today = datetime.now()
-    start_of_week = today - timedelta(days=today.weekday())
-    start_date = start_of_week.strftime('%Y-%m-%d')
+    user_id = _resolve_user_id(user_id)
+    start_date = _week_start()
 
+    # One row: the week's foods in meal order, plus the distinct rainbow
+    # colors among them
     query = """
+        WITH week_meals AS (
+            SELECT
+                m.log_date,
+                m.day_of_week,
+                m.meal_type,
+                f.name as food_name,
+                f.rainbow_color,
+                f.warning_message,
+                m.meal_type_order
+            FROM meals m
+            JOIN meal_items mi ON m.id = mi.meal_id
+            JOIN foods f ON mi.food_id = f.id
+            WHERE m.user_id = %s
+                AND m.log_date >= %s
+        )
         SELECT
-            m.log_date,
-            m.day_of_week,
-            m.meal_type,
-            f.name as food_name,
-            f.rainbow_color,
-            f.warning_message
-        FROM meals m
-        JOIN meal_items mi ON m.id = mi.meal_id
-        JOIN foods f ON mi.food_id = f.id
-        WHERE m.user_id = %s
-            AND m.log_date >= %s
-        ORDER BY m.log_date,
-            CASE m.meal_type
-                WHEN 'breakfast' THEN 1
-                WHEN 'lunch' THEN 2
-                WHEN 'dinner' THEN 3
-                WHEN 'snacks' THEN 4
-            END
+            coalesce(json_agg(w ORDER BY w.log_date, w.meal_type_order), '[]') AS food_rows,
+            coalesce(array_agg(DISTINCT w.rainbow_color)
+                FILTER (WHERE w.rainbow_color IS NOT NULL), '{}') AS week_colors
+        FROM week_meals w
     """
 
-    results = execute_query(query, (user_id, start_date), fetch_one=False)
+    result = execute_prepared('tools_week_meals', query, (user_id, start_date), fetch_one=True)
+    return _shape_week_meals(start_date, result['food_rows'], result['week_colors'])
+
 
+def _shape_week_meals(start_date: str, results: List[Dict[str, Any]], rainbow_colors: List[str]) -> Dict[str, Any]:
+    """Build the get_current_week_meals_tool result from its food rows and sorted distinct colors"""
     if not results:
         return {
             "message": "No meals found for current week",
@@ -168,7 +227,6 @@ def get_current_week_meals_tool(user_id: Optional[str] = None) -> Dict[str, Any]
 
     # Organize meals by day and meal type
     meals_by_day = {}
-    rainbow_colors = set()
 
     for row in results:
         date = str(row['log_date'])
@@ -193,9 +251,6 @@ def get_current_week_meals_tool(user_id: Optional[str] = None) -> Dict[str, Any]
 
         meals_by_day[date]["meals"][meal_type].append(food_info)
 
-        if row['rainbow_color']:
-            rainbow_colors.add(row['rainbow_color'])
-
     meals_list = list(meals_by_day.values())
 
     return {
@@ -203,7 +258,7 @@ def get_current_week_meals_tool(user_id: Optional[str] = None) -> Dict[str, Any]
         "meals": meals_list,
         "summary": {
             "total_foods": len(results),
-            "rainbow_colors": sorted(list(rainbow_colors)),
+            "rainbow_colors": rainbow_colors,
             "days_with_meals": len(meals_by_day)
         }
     }
@@ -222,38 +277,41 @@ def get_rainbow_summary_tool(user_id: Optional[str] = None) -> Dict[str, Any]:
     Returns:
         Dictionary with rainbow color summary
     """
-    # If no user_id provided, try to get from session context
-    if user_id is None:
-        try:
-            from google.adk.sessions import get_current_session
-            session = get_current_session()
-            user_id = session.state.get("user_id", "00000000-0000-0000-0000-000000000001")
-        except Exception:
-            user_id = "00000000-0000-0000-0000-000000000001"
-    # Get the start of the current week
-    today = datetime.now()
-    start_of_week = today - timedelta(days=today.weekday())
-    start_date = start_of_week.strftime('%Y-%m-%d')
+    user_id = _resolve_user_id(user_id)
+    start_date = _week_start()
 
+    # Only the first few food names per color (alphabetically) are kept as
+    # examples; the prompt doesn't need the full list
     query = """
         SELECT
-            f.rainbow_color,
-            COUNT(DISTINCT m.log_date) as days_consumed,
+            rainbow_color,
+            COUNT(DISTINCT log_date) as days_consumed,
             COUNT(*) as times_consumed,
-            STRING_AGG(DISTINCT f.name, ', ' ORDER BY f.name) as example_foods
-        FROM meals m
-        JOIN meal_items mi ON m.id = mi.meal_id
-        JOIN foods f ON mi.food_id = f.id
-        WHERE m.user_id = %s
-            AND m.log_date >= %s
-            AND f.rainbow_color IS NOT NULL
-        GROUP BY f.rainbow_color
-        ORDER BY f.rainbow_color
+            STRING_AGG(DISTINCT name, ', ' ORDER BY name)
+                FILTER (WHERE name_rank <= 5) as example_foods
+        FROM (
+            SELECT
+                f.rainbow_color,
+                f.name,
+                m.log_date,
+                DENSE_RANK() OVER (PARTITION BY f.rainbow_color ORDER BY f.name) as name_rank
+            FROM meals m
+            JOIN meal_items mi ON m.id = mi.meal_id
+            JOIN foods f ON mi.food_id = f.id
+            WHERE m.user_id = %s
+                AND m.log_date >= %s
+                AND f.rainbow_color IS NOT NULL
+        ) color_foods
+        GROUP BY rainbow_color
+        ORDER BY rainbow_color
     """
 
-    results = execute_query(query, (user_id, start_date), fetch_one=False)
+    results = execute_prepared('tools_rainbow_summary', query, (user_id, start_date))
+    return _shape_rainbow_summary(start_date, results)
+
 
-    all_colors = ['Red', 'Orange/Yellow', 'Green', 'Blue/Purple', 'White/Brown']
+def _shape_rainbow_summary(start_date: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build the get_rainbow_summary_tool result from its per-color rows"""
     consumed_colors = {}
 
     for row in results:
@@ -264,14 +322,105 @@ def get_rainbow_summary_tool(user_id: Optional[str] = None) -> Dict[str, Any]:
             "example_foods": row['example_foods']
         }
 
-    missing_colors = [c for c in all_colors if c not in consumed_colors]
+    missing_colors = [c for c in ALL_RAINBOW_COLORS if c not in consumed_colors]
 
     return {
         "start_date": start_date,
         "consumed_colors": consumed_colors,
         "missing_colors": missing_colors,
         "total_colors_consumed": len(consumed_colors),
-        "colors_needed": 5 - len(consumed_colors)
+        "colors_needed": len(ALL_RAINBOW_COLORS) - len(consumed_colors)
+    }
+
+
+def get_user_context_bundle(user_id: str) -> Dict[str, Any]:
+    """
+    Load user info, this week's meals and the rainbow summary in one query.
+
+    Runs the three tool queries as CTEs of a single statement, each folded
+    into a JSON column, so callers that need all of them (e.g. the greeting
+    prompt) pay one round trip instead of three. The results have the same
+    shape as the matching tools.
+
+    Args:
+        user_id: User ID
+
+    Returns:
+        Dictionary with "user_info", "week_meals" and "rainbow_summary"
+    """
+    start_date = _week_start()
+
+    query = """
+        WITH user_info AS (
+            SELECT
+                first_name,
+                due_date,
+                last_period_date,
+                dietary_restrictions,
+                preferred_unit,
+                daily_caffeine_limit
+            FROM users
+            WHERE id = %s
+        ),
+        week_meals AS (
+            SELECT
+                m.log_date,
+                m.day_of_week,
+                m.meal_type,
+                f.name as food_name,
+                f.rainbow_color,
+                f.warning_message,
+                m.meal_type_order
+            FROM meals m
+            JOIN meal_items mi ON m.id = mi.meal_id
+            JOIN foods f ON mi.food_id = f.id
+            WHERE m.user_id = %s
+                AND m.log_date >= %s
+        ),
+        rainbow_summary AS (
+            SELECT
+                rainbow_color,
+                COUNT(DISTINCT log_date) as days_consumed,
+                COUNT(*) as times_consumed,
+                STRING_AGG(DISTINCT name, ', ' ORDER BY name)
+                    FILTER (WHERE name_rank <= 5) as example_foods
+            FROM (
+                SELECT
+                    f.rainbow_color,
+                    f.name,
+                    m.log_date,
+                    DENSE_RANK() OVER (PARTITION BY f.rainbow_color ORDER BY f.name) as name_rank
+                FROM meals m
+                JOIN meal_items mi ON m.id = mi.meal_id
+                JOIN foods f ON mi.food_id = f.id
+                WHERE m.user_id = %s
+                    AND m.log_date >= %s
+                    AND f.rainbow_color IS NOT NULL
+            ) color_foods
+            GROUP BY rainbow_color
+        )
+        SELECT
+            (SELECT row_to_json(u) FROM user_info u) AS user_info,
+            (SELECT coalesce(json_agg(w ORDER BY w.log_date, w.meal_type_order), '[]')
+                FROM week_meals w) AS week_meals,
+            (SELECT coalesce(array_agg(DISTINCT w.rainbow_color)
+                    FILTER (WHERE w.rainbow_color IS NOT NULL), '{}')
+                FROM week_meals w) AS week_colors,
+            (SELECT coalesce(json_agg(r ORDER BY r.rainbow_color), '[]')
+                FROM rainbow_summary r) AS rainbow_summary
+    """
+
+    result = execute_prepared(
+        'tools_context_bundle',
+        query,
+        (user_id, user_id, start_date, user_id, start_date),
+        fetch_one=True
+    )
+
+    return {
+        "user_info": _shape_user_info(user_id, result['user_info']),
+        "week_meals": _shape_week_meals(start_date, result['week_meals'], result['week_colors']),
+        "rainbow_summary": _shape_rainbow_summary(start_date, result['rainbow_summary'])
     }
 
 
@@ -300,14 +449,7 @@ def log_sleep_tool(
     Returns:
         Dictionary with success status and logged information
     """
-    # Get user_id from session if not provided
-    if user_id is None:
-        try:
-            from google.adk.sessions import get_current_session
-            session = get_current_session()
-            user_id = session.state.get("user_id", "00000000-0000-0000-0000-000000000001")
-        except Exception:
-            user_id = "00000000-0000-0000-0000-000000000001"
+    user_id = _resolve_user_id(user_id)
 
     # Default to today if no date provided
     if log_date is None:
@@ -321,42 +463,25 @@ def log_sleep_tool(
             "error": f"Invalid sleep quality. Must be one of: {', '.join(valid_qualities)}"
         }
 
-    # Check if log already exists for this date
-    check_query = """
-        SELECT id, symptoms, symptom_severity, symptom_notes
-        FROM daily_logs
-        WHERE user_id = %s AND log_date = %s
+    # Create the day's log or update its sleep fields in one statement;
+    # symptoms already logged for the day are left as they are
+    upsert_query = """
+        INSERT INTO daily_logs (user_id, log_date, sleep_hours, sleep_quality, sleep_notes)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (user_id, log_date) DO UPDATE
+        SET sleep_hours = EXCLUDED.sleep_hours,
+            sleep_quality = EXCLUDED.sleep_quality,
+            sleep_notes = EXCLUDED.sleep_notes,
+            updated_at = NOW()
     """
-    existing_log = execute_query(check_query, (user_id, log_date), fetch_one=True)
-
-    if existing_log:
-        # Update existing log
-        update_query = """
-            UPDATE daily_logs
-            SET sleep_hours = %s,
-                sleep_quality = %s,
-                sleep_notes = %s,
-                updated_at = NOW()
-            WHERE user_id = %s AND log_date = %s
-            RETURNING id
-        """
-        execute_query(
-            update_query,
-            (sleep_hours, sleep_quality, sleep_notes, user_id, log_date),
-            fetch_one=True
-        )
-    else:
-        # Insert new log
-        insert_query = """
-            INSERT INTO daily_logs (user_id, log_date, sleep_hours, sleep_quality, sleep_notes)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING id
-        """
-        execute_query(
-            insert_query,
-            (user_id, log_date, sleep_hours, sleep_quality, sleep_notes),
-            fetch_one=True
-        )
+    execute_prepared(
+        'tools_log_sleep',
+        upsert_query,
+        (user_id, log_date, sleep_hours, sleep_quality, sleep_notes),
+        fetch_all=False
+    )
+
+    invalidate_daily_log(user_id, log_date)
 
     return {
         "success": True,
@@ -396,14 +521,7 @@ def log_symptoms_tool(
     Returns:
         Dictionary with success status and logged information
     """
-    # Get user_id from session if not provided
-    if user_id is None:
-        try:
-            from google.adk.sessions import get_current_session
-            session = get_current_session()
-            user_id = session.state.get("user_id", "00000000-0000-0000-0000-000000000001")
-        except Exception:
-            user_id = "00000000-0000-0000-0000-000000000001"
+    user_id = _resolve_user_id(user_id)
 
     # Default to today if no date provided
     if log_date is None:
@@ -420,42 +538,25 @@ def log_symptoms_tool(
     # Normalize symptom names (lowercase, replace spaces with underscores)
     normalized_symptoms = [s.lower().replace(' ', '_') for s in symptoms]
 
-    # Check if log already exists for this date
-    check_query = """
-        SELECT id, sleep_hours, sleep_quality, sleep_notes
-        FROM daily_logs
-        WHERE user_id = %s AND log_date = %s
+    # Create the day's log or update its symptom fields in one statement;
+    # sleep already logged for the day is left as it is
+    upsert_query = """
+        INSERT INTO daily_logs (user_id, log_date, symptoms, symptom_severity, symptom_notes)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (user_id, log_date) DO UPDATE
+        SET symptoms = EXCLUDED.symptoms,
+            symptom_severity = EXCLUDED.symptom_severity,
+            symptom_notes = EXCLUDED.symptom_notes,
+            updated_at = NOW()
     """
-    existing_log = execute_query(check_query, (user_id, log_date), fetch_one=True)
-
-    if existing_log:
-        # Update existing log
-        update_query = """
-            UPDATE daily_logs
-            SET symptoms = %s,
-                symptom_severity = %s,
-                symptom_notes = %s,
-                updated_at = NOW()
-            WHERE user_id = %s AND log_date = %s
-            RETURNING id
-        """
-        execute_query(
-            update_query,
-            (normalized_symptoms, symptom_severity, symptom_notes, user_id, log_date),
-            fetch_one=True
-        )
-    else:
-        # Insert new log
-        insert_query = """
-            INSERT INTO daily_logs (user_id, log_date, symptoms, symptom_severity, symptom_notes)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING id
-        """
-        execute_query(
-            insert_query,
-            (user_id, log_date, normalized_symptoms, symptom_severity, symptom_notes),
-            fetch_one=True
-        )
+    execute_prepared(
+        'tools_log_symptoms',
+        upsert_query,
+        (user_id, log_date, normalized_symptoms, symptom_severity, symptom_notes),
+        fetch_all=False
+    )
+
+    invalidate_daily_log(user_id, log_date)
 
     return {
         "success": True,
@@ -482,14 +583,7 @@ def get_daily_log_tool(
     Returns:
         Dictionary with daily log information or message if no log exists
     """
-    # Get user_id from session if not provided
-    if user_id is None:
-        try:
-            from google.adk.sessions import get_current_session
-            session = get_current_session()
-            user_id = session.state.get("user_id", "00000000-0000-0000-0000-000000000001")
-        except Exception:
-            user_id = "00000000-0000-0000-0000-000000000001"
+    user_id = _resolve_user_id(user_id)
 
     # Default to today if no date provided
     if log_date is None:
@@ -508,7 +602,7 @@ def get_daily_log_tool(
         WHERE user_id = %s AND log_date = %s
     """
 
-    result = execute_query(query, (user_id, log_date), fetch_one=True)
+    result = execute_prepared('tools_daily_log', query, (user_id, log_date), fetch_one=True)
 
     if not result:
         return {
@@ -529,18 +623,39 @@ def get_daily_log_tool(
     }
 
 
+def _in_thread(func):
+    """
+    Wrap a blocking tool as a coroutine that runs it on a worker thread.
+
+    ADK calls sync tools directly on the event loop, so every DB round trip
+    would stall all other chat turns; async tools are awaited instead.
+    functools.wraps keeps the name, docstring and signature ADK builds the
+    tool declaration from.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return wrapper
+
+
 # Tool definitions for Google ADK
+@functools.lru_cache(maxsize=1)
 def create_user_tools():
-    """Create tool definitions for the agent"""
+    """
+    Create tool definitions for the agent
+
+    Built once per process; every caller gets the same FunctionTool list,
+    so treat it as read-only.
+    """
     from google.adk.tools.function_tool import FunctionTool
 
     tools = [
-        FunctionTool(func=get_user_info_tool),
-        FunctionTool(func=get_current_week_meals_tool),
-        FunctionTool(func=get_rainbow_summary_tool),
-        FunctionTool(func=log_sleep_tool),
-        FunctionTool(func=log_symptoms_tool),
-        FunctionTool(func=get_daily_log_tool)
+        FunctionTool(func=_in_thread(get_user_info_tool)),
+        FunctionTool(func=_in_thread(get_current_week_meals_tool)),
+        FunctionTool(func=_in_thread(get_rainbow_summary_tool)),
+        FunctionTool(func=_in_thread(log_sleep_tool)),
+        FunctionTool(func=_in_thread(log_symptoms_tool)),
+        FunctionTool(func=_in_thread(get_daily_log_tool))
     ]
 
     return tools
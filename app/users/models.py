@@ -14,3 +14,8 @@ class User(BaseModel):
     notificationOptIn: bool = True
     createdAt: datetime
     updatedAt: Optional[datetime] = None
+
+class UserAuth(BaseModel):
+    """Just the identity columns, for callers that only check who a user is"""
+    id: str
+    email: str
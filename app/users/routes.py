@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
-from users.service import user_service
+from fastapi.responses import ORJSONResponse
+from users.service import get_user_service
 from users.models import User
 
 router = APIRouter(prefix="/api/users", tags=["users"])
@@ -8,10 +9,11 @@ router = APIRouter(prefix="/api/users", tags=["users"])
 async def get_user(user_id: str):
     """Get user by ID"""
     try:
-        user = user_service.get_user_by_id(user_id)
+        user = await get_user_service().get_user_by_id_async(user_id)
         if not user:
             raise HTTPException(status_code=404, detail=f"User not found: {user_id}")
-        return user
+        # Already a validated User; skip response_model re-validation
+        return ORJSONResponse(user.model_dump())
     except HTTPException:
         raise
     except Exception as e:
@@ -1,50 +1,197 @@
-from typing import Optional, Dict
+import asyncio
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional
 from datetime import date
-from db.pg_database import execute_query
-from users.models import User
+from cachetools import TTLCache
+from db.pg_database import execute_prepared, stream_query
+from users.models import User, UserAuth
+
+# Read-through cache of User models keyed by user_id; a profile page load and
+# the calls around it read the same user several times within seconds
+_user_cache = TTLCache(maxsize=10_000, ttl=60)
+_user_lock = threading.Lock()
+
+# Ids recently found not to exist (stale links, bad tokens); repeat lookups
+# return None without querying until the entry expires or invalidate() runs
+_missing_user_cache = TTLCache(maxsize=10_000, ttl=10)
+
+# User columns in _map_user's order. The preference columns are NOT NULL with
+# the User model defaults (migration 008). The statements are built once at
+# import so every call passes the same string object to execute_prepared.
+_USER_COLUMNS = """
+    id,
+    email,
+    first_name,
+    due_date,
+    last_period_date,
+    dietary_restrictions,
+    preferred_unit,
+    daily_caffeine_limit,
+    notification_opt_in,
+    created_at,
+    updated_at
+"""
+
+_USER_BY_ID_SQL = f"SELECT {_USER_COLUMNS} FROM users WHERE id = %s"
+
+# psycopg2 sends the id list as ARRAY['...'], a text[]; the prepared
+# parameter must be text[] too (text -> uuid has no assignment cast for
+# EXECUTE to apply), with the uuid cast done inside the statement
+_USERS_BY_IDS_SQL = f"SELECT {_USER_COLUMNS} FROM users WHERE id = ANY(%s::text[]::uuid[])"
+
+_ALL_USERS_SQL = f"SELECT {_USER_COLUMNS} FROM users ORDER BY created_at"
+
+_USER_AUTH_BY_ID_SQL = "SELECT id, email FROM users WHERE id = %s"
+
 
 class UserService:
     def get_user_by_id(self, user_id: str) -> Optional[User]:
-        """Get user by ID"""
-        query = """
-            SELECT
-                id,
-                email,
-                first_name,
-                due_date,
-                last_period_date,
-                dietary_restrictions,
-                preferred_unit,
-                daily_caffeine_limit,
-                notification_opt_in,
-                created_at,
-                updated_at
-            FROM users
-            WHERE id = %s
+        """Get user by ID
+
+        Served from a 60 second cache (10 seconds for unknown ids); write
+        paths call invalidate().
+        """
+        key = str(user_id)
+        with _user_lock:
+            if key in _missing_user_cache:
+                return None
+            user = _user_cache.get(key)
+        if user is not None:
+            return user
+
+        user = self._fetch_user(user_id)
+        with _user_lock:
+            if user is not None:
+                _user_cache[key] = user
+            else:
+                _missing_user_cache[key] = True
+        return user
+
+    async def get_user_by_id_async(self, user_id: str) -> Optional[User]:
+        """Async variant of get_user_by_id; runs the lookup in a worker thread.
+
+        Composite endpoints can overlap it with their other reads, e.g.
+        ``user, log = await asyncio.gather(user_service.get_user_by_id_async(uid),
+        asyncio.to_thread(daily_log_service.get_daily_log, uid, day))``.
+        """
+        return await asyncio.to_thread(self.get_user_by_id, user_id)
+
+    def get_user_auth(self, user_id: str) -> Optional[UserAuth]:
+        """Get just a user's id and email
+
+        Reuses a cached User when there is one; otherwise selects only those
+        two columns rather than the full profile.
+        """
+        key = str(user_id)
+        with _user_lock:
+            if key in _missing_user_cache:
+                return None
+            user = _user_cache.get(key)
+        if user is not None:
+            return UserAuth.model_construct(id=user.id, email=user.email)
+
+        result = execute_prepared('users_auth_by_id', _USER_AUTH_BY_ID_SQL, (user_id,), fetch_one=True, cursor_factory=None)
+
+        if not result:
+            with _user_lock:
+                _missing_user_cache[key] = True
+            return None
+
+        id_, email = result
+        return UserAuth.model_construct(id=id_, email=email)
+
+    def get_users_by_ids(self, user_ids: Iterable[str]) -> Dict[str, User]:
+        """Get many users in one query, keyed by user_id
+
+        Cached users are served from the cache and the rest are fetched with
+        a single ANY() lookup. Unknown ids are absent from the result.
         """
+        keys = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+        users: Dict[str, User] = {}
+        missing = []
+        with _user_lock:
+            for key in keys:
+                user = _user_cache.get(key)
+                if user is not None:
+                    users[key] = user
+                elif key not in _missing_user_cache:
+                    missing.append(key)
 
-        result = execute_query(query, (user_id,), fetch_one=True)
+        if missing:
+            fetched = self._fetch_users(missing)
+            with _user_lock:
+                _user_cache.update(fetched)
+                for key in missing:
+                    if key not in fetched:
+                        _missing_user_cache[key] = True
+            users.update(fetched)
+        return users
+
+    def iter_users(self, batch_size: int = 1000) -> Iterator[List[User]]:
+        """Walk every user in batches, oldest first
+
+        For jobs that scan the whole table; rows come through a server-side
+        cursor and bypass the cache.
+        """
+        for rows in stream_query(_ALL_USERS_SQL, batch_size=batch_size, cursor_factory=None):
+            yield [self._map_user(row) for row in rows]
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop the cached user after their row is created, changed or deleted"""
+        key = str(user_id)
+        with _user_lock:
+            _user_cache.pop(key, None)
+            _missing_user_cache.pop(key, None)
+
+    def _fetch_user(self, user_id: str) -> Optional[User]:
+        """Read a single user from the database"""
+        # Plain tuple row, unpacked positionally in _map_user
+        result = execute_prepared('users_by_id', _USER_BY_ID_SQL, (user_id,), fetch_one=True, cursor_factory=None)
 
         if not result:
             return None
 
         return self._map_user(result)
 
-    def _map_user(self, row: Dict) -> User:
-        """Map database row to User model"""
-        return User(
-            id=row['id'],
-            email=row['email'],
-            firstName=row['first_name'],
-            dueDate=row.get('due_date'),
-            lastPeriodDate=row.get('last_period_date'),
-            dietaryRestrictions=row.get('dietary_restrictions') or [],
-            preferredUnit=row.get('preferred_unit', 'metric'),
-            dailyCaffeineLimit=row.get('daily_caffeine_limit', 200),
-            notificationOptIn=row.get('notification_opt_in', True),
-            createdAt=row['created_at'],
-            updatedAt=row.get('updated_at')
+    def _fetch_users(self, user_ids: list) -> Dict[str, User]:
+        """Read several users from the database in one round trip"""
+        # A list, not a tuple: psycopg2 adapts lists as ARRAY[...]
+        rows = execute_prepared('users_by_ids', _USERS_BY_IDS_SQL, (user_ids,), cursor_factory=None)
+        return {str(row[0]): self._map_user(row) for row in rows}
+
+    def _map_user(self, row: tuple) -> User:
+        """Map a users row, in get_user_by_id's SELECT order, to User model
+
+        The preference columns are NOT NULL with the model defaults and
+        column types already match the model (psycopg2 returns uuid columns
+        as str), so fields are assigned as-is and validation is skipped.
+        """
+        (id_, email, first_name, due_date, last_period_date, diet, unit,
+         caffeine_limit, notification_opt_in, created_at, updated_at) = row
+        return User.model_construct(
+            id=id_,
+            email=email,
+            firstName=first_name,
+            dueDate=due_date,
+            lastPeriodDate=last_period_date,
+            dietaryRestrictions=diet,
+            preferredUnit=unit,
+            dailyCaffeineLimit=caffeine_limit,
+            notificationOptIn=notification_opt_in,
+            createdAt=created_at,
+            updatedAt=updated_at
         )
 
-# Singleton instance
-user_service = UserService()
+@lru_cache(maxsize=1)
+def get_user_service() -> UserService:
+    """Create the shared UserService on first use"""
+    return UserService()
+
+
+def __getattr__(name):
+    # Keep `from users.service import user_service` working without
+    # instantiating the service at import time
+    if name == "user_service":
+        return get_user_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
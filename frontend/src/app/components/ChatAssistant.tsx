@@ -14,6 +14,10 @@ interface ChatAssistantProps {
   userId?: string;
 }
 
+// A new greeting is generated in the background; poll until it replaces the placeholder
+const GREETING_POLL_INTERVAL_MS = 2000;
+const GREETING_POLL_ATTEMPTS = 15;
+
 export default function ChatAssistant({ userId = "00000000-0000-0000-0000-000000000001" }: ChatAssistantProps) {
   const [messages, setMessages] = useState<Message[]>([]);
   const [input, setInput] = useState("");
@@ -25,6 +29,28 @@ export default function ChatAssistant({ userId = "00000000-0000-0000-0000-000000
 
   // Load message history and greeting on mount
   useEffect(() => {
+    let cancelled = false;
+
+    const pollForGreeting = async (placeholderId: string) => {
+      for (let attempt = 0; attempt < GREETING_POLL_ATTEMPTS && !cancelled; attempt++) {
+        await new Promise((resolve) => setTimeout(resolve, GREETING_POLL_INTERVAL_MS));
+        if (cancelled) return;
+        try {
+          const greetingResponse = await getDailyGreeting(userId);
+          if (!greetingResponse.pending) {
+            setMessages((prev) => prev.map((m) => m.id === placeholderId ? {
+              id: greetingResponse.message_id,
+              text: greetingResponse.greeting,
+              role: 'model',
+            } : m));
+            return;
+          }
+        } catch (error) {
+          console.error('Error polling for greeting:', error);
+        }
+      }
+    };
+
     const loadInitialData = async () => {
       try {
         setLoading(true);
@@ -50,6 +76,9 @@ export default function ChatAssistant({ userId = "00000000-0000-0000-0000-000000
             text: greetingResponse.greeting,
             role: 'model',
           });
+          if (greetingResponse.pending) {
+            pollForGreeting(greetingResponse.message_id);
+          }
         }
 
         setMessages(loadedMessages);
@@ -67,6 +96,10 @@ export default function ChatAssistant({ userId = "00000000-0000-0000-0000-000000
     };
 
     loadInitialData();
+
+    return () => {
+      cancelled = true;
+    };
   }, [userId]);
 
   // Set initial load to false after component mounts
@@ -156,6 +156,7 @@ export interface GreetingResponse {
   greeting: string;
   is_new: boolean;
   message_id: string;
+  pending?: boolean;
 }
 
 export async function getDailyGreeting(userId: string): Promise<GreetingResponse> {
@@ -174,17 +175,22 @@ export interface MessageHistoryResponse {
     metadata: Record<string, any>;
   }>;
   count: number;
+  next_cursor?: string | null;
 }
 
 export async function getMessageHistory(
   userId: string,
   limit: number = 50,
-  sinceDate?: string
+  sinceDate?: string,
+  before?: string
 ): Promise<MessageHistoryResponse> {
   let url = `/api/agent/messages/${userId}?limit=${limit}`;
   if (sinceDate) {
     url += `&since_date=${sinceDate}`;
   }
+  if (before) {
+    url += `&before=${encodeURIComponent(before)}`;
+  }
   return fetchApi(url);
 }
 